@@ -0,0 +1,169 @@
+'''
+Benchmarks for the data_tsa profiler, inspectors and anomaly detector.
+
+Each case is timed (best of --repeat runs) and its peak traced memory is
+recorded. Results can be saved as a JSON baseline and later compared
+against one; the comparison exits with status 1 when any case is slower or
+uses more memory than the baseline by more than --threshold.
+
+Usage:
+    python -m benchmarks.benchmark --save baseline.json
+    python -m benchmarks.benchmark --compare baseline.json --threshold 0.2
+    python -m benchmarks.benchmark --sizes 10000 1000000 10000000 --cases inspector
+'''
+
+import argparse
+import io
+import json
+import sys
+import tracemalloc
+from contextlib import redirect_stdout
+from time import perf_counter
+
+from data_tsa.anomaly_detector import AnomalyDetector
+from data_tsa.boolean_inspector import BooleanInspector
+from data_tsa.dataframe_inspector import DataFrameInspector
+from data_tsa.date_inspector import DateInspector
+from data_tsa.number_inspector import NumberInspector
+from data_tsa.profiler import Profiler
+from data_tsa.sample_data import SampleData
+from data_tsa.string_inspector import StringInspector
+
+inspector_columns = [('number', NumberInspector, 'mixed_sign_numbers'),
+                     ('string', StringInspector, 'duplicate_string'),
+                     ('datetime', DateInspector, 'created_at'),
+                     ('bool', BooleanInspector, 'partial_null')]
+
+
+def get_sample_data(n, slices=4, width=0):
+    '''Returns a seeded SampleData frame with a 'slice' column and `width`
+    extra number columns.'''
+    return SampleData(n, seed=0, slices=slices, width=width).get_sample_data()
+
+
+def measure(func, repeat):
+    '''Returns the best wall time of func() over `repeat` untraced runs and
+    the peak traced memory of one additional run.'''
+    times = []
+    with redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = perf_counter()
+            func()
+            times.append(perf_counter() - start)
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {'seconds': min(times), 'peak_bytes': peak}
+
+
+def inspector_cases(sizes):
+    for n in sizes:
+        df = get_sample_data(n)
+        for name, inspector, column in inspector_columns:
+            series = df[column]
+            yield 'inspector.{}.n={}'.format(name, n), \
+                  lambda i=inspector, s=series: i(s).inspect()
+
+
+def profile_cases(sizes, slice_counts=(1, 8, 32), widths=(0, 8)):
+    for n in sizes:
+        for slices in slice_counts:
+            for width in widths:
+                df = get_sample_data(n, slices, width)
+                yield 'profile.n={}.slices={}.width={}'.format(n, slices, width), \
+                      lambda df=df: Profiler(df, slicer='slice').profile(lags=0)
+
+
+def lag_cases(sizes, depths=(1, 3, 10)):
+    for n in sizes:
+        df = get_sample_data(n, slices=32)
+        with redirect_stdout(io.StringIO()):
+            result = Profiler(df, slicer='slice').profile(lags=0)
+        for lags in depths:
+            yield 'get_lags.n={}.lags={}'.format(n, lags), \
+                  lambda df=df, r=result, l=lags: Profiler(df).get_lags(r.copy(), l)
+
+
+def duplicate_cases(sizes):
+    for n in sizes:
+        df = get_sample_data(n)
+        yield 'duplicates.n={}'.format(n), \
+              lambda df=df: DataFrameInspector(df).get_duplicate_rows()
+
+
+def detect_cases(sizes):
+    for n in sizes:
+        df = get_sample_data(n, slices=8)
+        profiler = Profiler(df, slicer='slice')
+        with redirect_stdout(io.StringIO()):
+            profiler.profile()
+        yield 'detect.n={}'.format(n), \
+              lambda p=profiler: AnomalyDetector(p).detect()
+
+
+cases = {'inspector': inspector_cases,
+         'profile': profile_cases,
+         'get_lags': lag_cases,
+         'duplicates': duplicate_cases,
+         'detect': detect_cases}
+
+
+def run(case_names, sizes, repeat):
+    '''Runs the selected benchmark cases and returns their results.'''
+    results = {}
+    for case_name in case_names:
+        for name, func in cases[case_name](sizes):
+            results[name] = measure(func, repeat)
+            print('{:<45} {:>10.4f}s {:>12,d}B'.format(name,
+                                                      results[name]['seconds'],
+                                                      results[name]['peak_bytes']))
+    return results
+
+
+def compare(results, baseline, threshold):
+    '''Returns a list of regression descriptions above the threshold.'''
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            reference = baseline[name][metric]
+            if reference and (result[metric] - reference) / reference > threshold:
+                regressions.append('{} {}: {:.4g} -> {:.4g} (+{:.0%})'.format(
+                    name, metric, reference, result[metric],
+                    (result[metric] - reference) / reference))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--cases', nargs='+', choices=sorted(cases),
+                        default=sorted(cases))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', help='write the results to a JSON baseline')
+    parser.add_argument('--compare', help='compare the results with a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed relative regression, default 0.2')
+    args = parser.parse_args(argv)
+
+    results = run(args.cases, args.sizes, args.repeat)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,92 @@
+'''
+This module contains the AnomalyDetector class, as well as the default
+rule configuration it applies.
+
+Attributes:
+    default_rules (list): A list of (measure, inspector, rule, params) tuples.
+        ``inspector`` may be None to match the measure for every inspector,
+        ``rule`` is the name of an AnomalyDetector rule method and ``params``
+        is a tuple of extra arguments passed to that rule.
+'''
+
+import numpy as np
+from warnings import catch_warnings, simplefilter
+from numpy.lib.stride_tricks import as_strided
 from data_tsa.profiler import Profiler
+from data_tsa.result_index import ResultIndex
 from re import findall
-from pandas import Series, DataFrame
+from pandas import Series, DataFrame, DatetimeIndex, concat, to_numeric
+
+default_rules = [('null_ratio', None, 'get_positive_ratio_flag', ()),
+                 ('null_ratio', None, 'get_zero_ratio_flag', ()),
+                 ('row_count', None, 'get_abs_perc_error_flag', (1,)),
+                 ('distinct_count', None, 'get_single_value_flag', ()),
+
+                 ('empty_ratio', 'string', 'get_positive_ratio_flag', ()),
+                 ('empty_ratio', 'string', 'get_zero_ratio_flag', ()),
+                 ('redundancy_indicator', 'string', 'get_positive_ratio_flag', ()),
+                 ('redundancy_indicator', 'string', 'get_zero_ratio_flag', ()),
+                 ('special_character_ratio', 'string', 'get_positive_ratio_flag', ()),
+                 ('special_character_ratio', 'string', 'get_zero_ratio_flag', ()),
+                 ('trim_required_ratio', 'string', 'get_positive_ratio_flag', ()),
+                 ('trim_required_ratio', 'string', 'get_zero_ratio_flag', ()),
+                 ('shape_ratios', 'string', 'get_shape_change_flag', (0.05,)),
+
+                 ('max_value', 'number', 'get_abs_perc_error_flag', (1,)),
+                 ('min_value', 'number', 'get_abs_perc_error_flag', (1,)),
+                 ('mean_value', 'number', 'get_abs_perc_error_flag', (1,)),
+                 ('median_value', 'number', 'get_abs_perc_error_flag', (1,)),
+                 ('stdev', 'number', 'get_abs_perc_error_flag', (1,)),
+                 ('value_skew', 'number', 'get_abs_perc_error_flag', (1,)),
+                 ('negative_ratio', 'number', 'get_positive_ratio_flag', ()),
+                 ('negative_ratio', 'number', 'get_zero_ratio_flag', ()),
+                 ('zero_ratio', 'number', 'get_positive_ratio_flag', ()),
+                 ('zero_ratio', 'number', 'get_zero_ratio_flag', ()),
+
+                 ('max_value', 'datetime', 'get_consistency_flag', ()),
+                 ('min_value', 'datetime', 'get_consistency_flag', (0,)),
+
+                 ('false_ratio', 'bool', 'get_positive_ratio_flag', ()),
+                 ('false_ratio', 'bool', 'get_zero_ratio_flag', ()),
+                 ('true_ratio', 'bool', 'get_positive_ratio_flag', ()),
+                 ('true_ratio', 'bool', 'get_zero_ratio_flag', ()),
+
+                 ('psi', 'number', 'get_threshold_flag', (0.25,)),
+                 ('ks_statistic', 'number', 'get_threshold_flag', (0.2,)),
+                 ('js_divergence', 'number', 'get_threshold_flag', (0.1,)),
+
+                 ('correlation', 'correlation', 'get_abs_delta_flag', (0.5,)),
+                 ('null_cooccurrence_ratio', 'correlation', 'get_abs_delta_flag', (0.2,))]
 
 class AnomalyDetector:    
     
-    def __init__(self, profiler, target_slice=None):
+    def __init__(self, profiler, target_slice=None, rules=None):
         '''Detects anomalies for metrics derived by a data_tsa.Profiler object.
         
         Args:
             profiler (data_tsa.Profiler): A profiler object that has generated a
                 data quality profile of some input DataFrame.
             target_slice (str): A specific slice to evaluate. The default value is
-                the last slice in the profiler.result DataFrame.
+                the last slice in the profiler.result DataFrame. With a
+                multi-column slicer, a value of the first slicer column (or
+                a tuple prefix) evaluates every slice beneath it, and the
+                default value is the last value of the first slicer column.
+            rules (list): A list of (measure, inspector, rule, params) tuples
+                to apply in detect(). The default value is
+                data_tsa.anomaly_detector.default_rules.
         '''
         self.lag_col_template = 'l{}_measure_value'
         self.default_abs_perc_delta_threshold = 0.1
+        self.min_scale_ratio = 0.01
+        self.max_anomaly_score = 1000
         
         self.profiler = self._validate_profiler(profiler)
         self.dataframe = self._get_target_slice_dataframe(target_slice)
         self.lags = self._get_lags()
+        self.rules = []
+        for rule in (default_rules if rules is None else rules):
+            self.add_rule(*rule)
+        self._dataframe_index = ResultIndex(self.dataframe)
         self.ad_dataframe =  DataFrame(columns=['inspector',
                                                 'column',
                                                 'slice',
@@ -28,9 +96,25 @@ class AnomalyDetector:
                                                 'flag',
                                                 'anomaly_score'])
     
+    @property
+    def ad_dataframe(self):
+        '''The anomaly detection outcome; assigning it invalidates its index.'''
+        return self._ad_dataframe
+
+    @ad_dataframe.setter
+    def ad_dataframe(self, value):
+        self._ad_dataframe = value
+        self._ad_index = None
+
+    def _get_ad_index(self):
+        '''Returns a data_tsa.ResultIndex over self.ad_dataframe, built on first use.'''
+        if self._ad_index is None:
+            self._ad_index = ResultIndex(self._ad_dataframe)
+        return self._ad_index
+
     def _validate_profiler(self, profiler):
         '''Verifies that the provided profiler is of the correct type.'''
-        if type(profiler) != Profiler:
+        if not isinstance(profiler, Profiler):
             raise TypeError('\'profiler\' argument must be a data_tsa.Profiler object.')
         return profiler
     
@@ -38,13 +122,28 @@ class AnomalyDetector:
         '''If no target_slice is provided, returns a default value.'''
         if not target_slice:
             target_slice = self._get_max_slice()
-        return self.profiler.result[self.profiler.result['slice']==target_slice]
+        self.target_slice = target_slice
+        if len(self.profiler.get_slicer_columns()) > 1:
+            result = self.profiler.result
+            return result[self._get_target_mask(result['slice'])]
+        return self.profiler.get_result_index().lookup(slice=target_slice)
     
     def _get_max_slice(self):
         '''Returns the last slice in the profile.result DataFrame.'''
-        slices = self.profiler.result['slice'].unique().tolist()
+        slices = self.profiler.result['slice'].drop_duplicates().tolist()
         slices.sort()
+        if len(self.profiler.get_slicer_columns()) > 1:
+            return slices[-1][0]
         return slices[-1]
+
+    def _get_target_mask(self, slices):
+        '''Returns a boolean mask of the slices under self.target_slice.'''
+        if len(self.profiler.get_slicer_columns()) < 2:
+            return (slices == self.target_slice).values
+        prefix = self.target_slice
+        if not isinstance(prefix, tuple):
+            prefix = (prefix,)
+        return slices.map(lambda _: _[:len(prefix)] == prefix).values.astype(bool)
         
     def _get_lags(self):
         '''Returns the number of lags calculated by the data_tsa.profiler object.'''
@@ -62,6 +161,18 @@ class AnomalyDetector:
         '''Returns a list of lagging column names.'''
         return [self.lag_col_template.format(_) for _ in range(1, lag + 1)]
         
+    def _append_anomaly(self, row, rule, reference_lags, flag, anomaly_score):
+        '''Writes the outcome of a rule for a profile row to self.ad_dataframe.'''
+        anomaly_row = Series({'inspector': row['inspector'],
+                              'column': row['column'],
+                              'slice': row['slice'],
+                              'measure': row['measure'],
+                              'rule': rule,
+                              'reference_lags': reference_lags,
+                              'flag': flag,
+                              'anomaly_score': anomaly_score})
+        self.ad_dataframe = self.ad_dataframe.append(anomaly_row, ignore_index=True)
+        
     class Decorators:
         '''Defines the decorators used by the AnomalyDetector class.'''
         
@@ -80,15 +191,7 @@ class AnomalyDetector:
                     if not self._validate_lag_value(row, lag):
                         break
                     flag = func(self, row, lag_cols, *args, **kwargs)
-                    anomaly_row = Series({'inspector': row['inspector'],
-                                          'column': row['column'],
-                                          'slice': row['slice'],
-                                          'measure': row['measure'],
-                                          'rule': func.__name__,
-                                          'reference_lags': lag,
-                                          'flag': flag,
-                                          'anomaly_score': lag * flag})
-                    self.ad_dataframe = self.ad_dataframe.append(anomaly_row, ignore_index=True)
+                    self._append_anomaly(row, func.__name__, lag, flag, lag * flag)
             return inner
         
     @Decorators.lag_iterator
@@ -136,7 +239,49 @@ class AnomalyDetector:
         if abs((row['measure_value'] - lag_mean) / lag_mean) > threshold:
             return 1
         return 0
+
+    @Decorators.lag_iterator
+    def get_abs_delta_flag(self, row, lag_cols, threshold):
+        '''Measures the absolute difference between the current slice and lags.
+
+        Returns 1 if the absolute difference between the current slice and the
+        average of the lagging values is greater than the specified threshold.
+        Unlike get_abs_perc_error_flag, this suits measures that are
+        naturally close to zero, such as correlations.
+
+        Args:
+            threshold (float): defines the absolute difference above which this
+                function will return 1.
+        '''
+        lag_mean = sum([row[_] for _ in lag_cols]) / len(lag_cols)
+        if abs(row['measure_value'] - lag_mean) > threshold:
+            return 1
+        return 0
         
+    @Decorators.lag_iterator
+    def get_shape_change_flag(self, row, lag_cols, min_ratio=0.05):
+        '''Flags shape signatures that appear or disappear.
+
+        Returns 1 if a shape covers at least min_ratio of the current slice
+        but is absent from all lags, or covers at least min_ratio of every
+        lag but is absent from the current slice; else 0. The rule applies
+        to the 'shape_ratios' measure, where absent means below
+        data_tsa.string_inspector.min_shape_ratio of the values.
+
+        Args:
+            min_ratio (float): the share of values below which a shape is
+                ignored.
+        '''
+        current = row['measure_value']
+        lags = [row[_] for _ in lag_cols]
+        new = [k for k, v in current.items()
+               if v >= min_ratio and all(k not in _ for _ in lags)]
+        gone = [k for k in lags[0]
+                if k not in current and all(_.get(k, 0) >= min_ratio for _ in lags)]
+        if new or gone:
+            return 1
+        return 0
+
     @Decorators.lag_iterator
     def get_consistency_flag(self, row, lag_cols, greater_than=1):
         '''Measures the consistency of aggregate values.
@@ -160,6 +305,59 @@ class AnomalyDetector:
             return 1
         return 0
     
+    def add_rule(self, measure, inspector, rule, params=()):
+        '''Adds a rule to the configuration applied by detect().
+
+        Args:
+            measure (str): a target measure to evaluate.
+            inspector (str): a target inspector to evaluate, or None to
+                evaluate the measure for every inspector.
+            rule (str): the name of an AnomalyDetector rule method.
+            params (tuple): arguments to be passed to the rule.
+        '''
+        if not callable(getattr(self, rule, None)):
+            raise ValueError('\'{}\' is not an AnomalyDetector rule.'.format(rule))
+        self.rules.append((measure, inspector, rule, tuple(params)))
+
+    def plan_rules(self):
+        '''Groups the configured rules by their (inspector, measure) filter key.
+
+        Returns:
+            Dictionary mapping (inspector, measure) to a list of
+            (rule, params) tuples, in configuration order.
+        '''
+        plan = {}
+        for measure, inspector, rule, params in self.rules:
+            plan.setdefault((inspector, measure), []).append((rule, params))
+        return plan
+
+    def _apply_planned_rules(self, row, rules):
+        '''Applies every (rule, params) pair in rules to a single row.
+
+        Rows without a measure value, e.g. the gap slices of empty time
+        buckets, are skipped.
+        '''
+        if row['measure_value'] is None:
+            return
+        for rule, params in rules:
+            getattr(self, rule)(row, *params)
+
+    def get_threshold_flag(self, row, threshold):
+        '''Flags measures that already compare a slice with its lags.
+
+        Returns 1 if the measure value, e.g. a drift measure such as 'psi',
+        is greater than the specified threshold; else 0. The outcome is
+        weighted by the number of lags.
+
+        Args:
+            threshold (float): defines the value above which this function
+                will return 1.
+        '''
+        value = row['measure_value']
+        flag = 1 if value is not None and value == value and value > threshold else 0
+        self._append_anomaly(row, 'get_threshold_flag', self.lags, flag, self.lags * flag)
+        return flag
+    
     def get_filtered_df(self, measure, inspector):
         '''Returns a filtered self.dataframe object
         
@@ -168,9 +366,8 @@ class AnomalyDetector:
             inspector (str): specifies an inspector value on which to filter.
         '''
         if not inspector:
-            return self.dataframe[self.dataframe['measure']==measure]
-        return self.dataframe[(self.dataframe['inspector']==inspector) & \
-                  (self.dataframe['measure']==measure)]
+            return self._dataframe_index.lookup(measure=measure)
+        return self._dataframe_index.lookup(inspector=inspector, measure=measure)
     
     def apply_rule(self, measure, rule_func, inspector=None, args=()):
         '''Applies a rule to a measure.
@@ -184,55 +381,200 @@ class AnomalyDetector:
         df = self.get_filtered_df(measure, inspector=inspector)
         df.apply(rule_func, 1, args=args)
         
+    def get_measure_matrix(self):
+        '''Returns the numeric measure history of the profile.
+
+        Returns:
+            A pandas.DataFrame indexed by slice with one column per
+            (inspector, column, measure). Non-numeric measures are dropped.
+            With a multi-column slicer, the index is the first slicer value
+            and the remaining slice values are additional column levels.
+        '''
+        df = self.profiler.result[['slice', 'inspector', 'column', 'measure']].copy()
+        df['value'] = to_numeric(self.profiler.result['measure_value'], errors='coerce')
+        keys = ['slice', 'inspector', 'column', 'measure']
+        slicer_columns = self.profiler.get_slicer_columns()
+        if len(slicer_columns) > 1:
+            slices = df['slice'].tolist()
+            for i in range(1, len(slicer_columns)):
+                df['slice_{}'.format(i)] = [_[i] for _ in slices]
+                keys.append('slice_{}'.format(i))
+            df['slice'] = [_[0] for _ in slices]
+        df = df.set_index(keys)['value']
+        return df.unstack(list(range(1, len(keys)))).sort_index().dropna(axis=1, how='all')
+
+    def _get_reference_windows(self, matrix, window):
+        '''Returns a (slice, column, window) view of the preceding values.
+
+        For each slice, the window holds the `window` prior values of every
+        column, padded with NaN at the start of the history.
+        '''
+        values = matrix.values.astype(float)
+        padded = np.vstack([np.full((window, values.shape[1]), np.nan), values])
+        row_stride, col_stride = padded.strides
+        return as_strided(padded,
+                          shape=(values.shape[0], values.shape[1], window),
+                          strides=(row_stride, col_stride, row_stride),
+                          writeable=False)
+
+    def _get_scaled_deviation(self, matrix, center, scale):
+        '''Returns |matrix - center| / scale, capped at self.max_anomaly_score.
+
+        The scale is floored at self.min_scale_ratio of |center|, or at
+        machine epsilon for a zero center, so a change after a flat history,
+        e.g. a null_ratio that was 0 every day, gets a large but finite score.
+        '''
+        deviation = (matrix - center).abs()
+        floor = np.maximum(center.abs() * self.min_scale_ratio, np.finfo(float).eps)
+        scale = scale.where(~(scale < floor), floor)
+        return (deviation / scale).clip(upper=self.max_anomaly_score)
+
+    def _stack_scores(self, scores, rule, window):
+        '''Transforms a score matrix into a long pandas.DataFrame.'''
+        levels = list(range(scores.columns.nlevels))
+        df = scores.stack(levels).reset_index()
+        sub_slices = list(df.columns[4:-1])
+        df.columns = ['slice', 'inspector', 'column', 'measure'] + sub_slices + ['score']
+        if sub_slices:
+            df['slice'] = list(zip(df['slice'], *[df[_] for _ in sub_slices]))
+        df['rule'] = rule
+        df['window'] = window
+        return df[['inspector', 'column', 'slice', 'measure', 'rule', 'window', 'score']]
+
+    def get_rolling_zscore(self, window=30, min_periods=3):
+        '''Scores every slice against the mean and standard deviation of
+        the preceding `window` slices.
+
+        Args:
+            window (int): The number of preceding slices in the baseline.
+            min_periods (int): The minimum number of non-null preceding values
+                required to produce a score.
+
+        Returns:
+            A long pandas.DataFrame with a continuous 'score' column.
+        '''
+        matrix = self.get_measure_matrix()
+        reference = matrix.shift(1).rolling(window, min_periods=min(min_periods, window))
+        scores = self._get_scaled_deviation(matrix, reference.mean(), reference.std())
+        return self._stack_scores(scores, 'rolling_zscore', window)
+
+    def get_rolling_mad_score(self, window=30, min_periods=3):
+        '''Scores every slice against the median and median absolute
+        deviation (MAD) of the preceding `window` slices.
+
+        The MAD is scaled by 1.4826 so that the score is comparable to a
+        z-score for normally distributed measures.
+
+        Args:
+            window (int): The number of preceding slices in the baseline.
+            min_periods (int): The minimum number of non-null preceding values
+                required to produce a score.
+
+        Returns:
+            A long pandas.DataFrame with a continuous 'score' column.
+        '''
+        matrix = self.get_measure_matrix()
+        windows = self._get_reference_windows(matrix, window)
+        with catch_warnings():
+            simplefilter('ignore', category=RuntimeWarning)
+            median = np.nanmedian(windows, axis=2)
+            mad = np.nanmedian(np.abs(windows - median[:, :, None]), axis=2)
+        enough = (~np.isnan(windows)).sum(axis=2) >= min(min_periods, window)
+        median = DataFrame(np.where(enough, median, np.nan),
+                           index=matrix.index, columns=matrix.columns)
+        mad = DataFrame(np.where(enough, mad * 1.4826, np.nan),
+                        index=matrix.index, columns=matrix.columns)
+        scores = self._get_scaled_deviation(matrix, median, mad)
+        return self._stack_scores(scores, 'rolling_mad_score', window)
+
+    def get_seasonal_zscore(self, period=7, window=8, min_periods=3):
+        '''Scores every slice against the same phase of prior seasons.
+
+        With daily slices and the default period of 7, each day is compared
+        to the same weekday in the preceding `window` weeks. Timestamp slices
+        are grouped by weekday when period is 7, so missing days don't shift
+        the baseline; otherwise the phase is the slice position, which
+        assumes contiguous slices.
+
+        Args:
+            period (int): The number of slices in a season.
+            window (int): The number of preceding seasons in the baseline.
+            min_periods (int): The minimum number of non-null preceding values
+                required to produce a score.
+
+        Returns:
+            A long pandas.DataFrame with a continuous 'score' column.
+        '''
+        matrix = self.get_measure_matrix()
+        if isinstance(matrix.index, DatetimeIndex) and period == 7:
+            phases = matrix.index.dayofweek
+        else:
+            phases = np.arange(len(matrix)) % period
+        scores = []
+        for phase in range(period):
+            m = matrix[phases == phase]
+            reference = m.shift(1).rolling(window, min_periods=min(min_periods, window))
+            scores.append(self._get_scaled_deviation(m, reference.mean(), reference.std()))
+        scores = concat(scores).loc[matrix.index]
+        return self._stack_scores(scores, 'seasonal_zscore', window)
+
+    def detect_rolling(self, window=30, threshold=3, period=7, seasonal_window=8):
+        '''Applies the rolling statistical rules to the target slice.
+
+        Flagged measures are added to self.ad_dataframe with the window as
+        'reference_lags' and the continuous score as 'anomaly_score'.
+
+        Args:
+            window (int): The number of preceding slices used by the rolling
+                z-score and MAD rules.
+            threshold (float): The score above which a measure is flagged.
+            period (int): The number of slices in a season.
+            seasonal_window (int): The number of preceding seasons used by the
+                seasonal rule.
+
+        Returns:
+            A summary dataframe of the anomaly detection outcome.
+        '''
+        scores = concat([self.get_rolling_zscore(window),
+                         self.get_rolling_mad_score(window),
+                         self.get_seasonal_zscore(period, seasonal_window)])
+        scores = scores[self._get_target_mask(scores['slice']) &
+                        (scores['score'] > threshold).values]
+        df = DataFrame({'inspector': scores['inspector'],
+                        'column': scores['column'],
+                        'slice': scores['slice'],
+                        'measure': scores['measure'],
+                        'rule': scores['rule'],
+                        'reference_lags': scores['window'],
+                        'flag': 1,
+                        'anomaly_score': scores['score']})
+        self.ad_dataframe = concat([self.ad_dataframe, df], ignore_index=True, sort=False)
+        return self.summary()
+
     def summary(self):
         '''Returns a summary dataframe of the anomaly detection outcome.'''
-        cols = ['column', 'anomaly_score']
-        df = self.ad_dataframe[cols].groupby('column').sum().reset_index()
+        df = self.ad_dataframe.groupby('column')['anomaly_score'].sum().reset_index()
         return df.sort_values('anomaly_score', ascending=0)
     
     def column_summary(self, column):
         '''Returns the anomaly detection outcome for a specific column.'''
-        return self.ad_dataframe[self.ad_dataframe['column']==column]
+        return self._get_ad_index().lookup(column=column)
     
     def rule_summary(self, rule):
         '''Returns the anomaly detection outcome for a specific rule function.'''
-        return self.ad_dataframe[self.ad_dataframe['rule']==rule]
+        return self._get_ad_index().lookup(rule=rule)
     
     def detect(self):
-        '''Detects anomalies and returns a summary dataframe.'''
-        self.apply_rule('null_ratio', self.get_positive_ratio_flag)
-        self.apply_rule('null_ratio', self.get_zero_ratio_flag)
-        self.apply_rule('row_count', self.get_abs_perc_error_flag, args=(1,))
-        self.apply_rule('distinct_count', self.get_single_value_flag)
-        
-        self.apply_rule('empty_ratio', self.get_positive_ratio_flag, inspector='string')
-        self.apply_rule('empty_ratio', self.get_zero_ratio_flag, inspector='string')
-        self.apply_rule('redundancy_indicator', self.get_positive_ratio_flag, inspector='string')
-        self.apply_rule('redundancy_indicator', self.get_zero_ratio_flag, inspector='string')
-        self.apply_rule('special_character_ratio', self.get_positive_ratio_flag, inspector='string')
-        self.apply_rule('special_character_ratio', self.get_zero_ratio_flag, inspector='string')
-        self.apply_rule('trim_required_ratio', self.get_positive_ratio_flag, inspector='string')
-        self.apply_rule('trim_required_ratio', self.get_zero_ratio_flag, inspector='string')
-        
-        self.apply_rule('max_value', self.get_abs_perc_error_flag, inspector='number', args=(1,))
-        self.apply_rule('min_value', self.get_abs_perc_error_flag, inspector='number', args=(1,))
-        self.apply_rule('mean_value', self.get_abs_perc_error_flag, inspector='number', args=(1,))
-        self.apply_rule('median_value', self.get_abs_perc_error_flag, inspector='number', args=(1,))
-        self.apply_rule('stdev', self.get_abs_perc_error_flag, inspector='number', args=(1,))
-        self.apply_rule('value_skew', self.get_abs_perc_error_flag, inspector='number', args=(1,))
-        self.apply_rule('negative_ratio', self.get_positive_ratio_flag, inspector='number')
-        self.apply_rule('negative_ratio', self.get_zero_ratio_flag, inspector='number')
-        self.apply_rule('zero_ratio', self.get_positive_ratio_flag, inspector='number')
-        self.apply_rule('zero_ratio', self.get_zero_ratio_flag, inspector='number')
-        
-        self.apply_rule('max_value', self.get_consistency_flag, inspector='datetime')
-        self.apply_rule('min_value', self.get_consistency_flag, inspector='datetime', args=(0,))
-        
-        self.apply_rule('false_ratio', self.get_positive_ratio_flag, inspector='bool')
-        self.apply_rule('false_ratio', self.get_zero_ratio_flag, inspector='bool')
-        self.apply_rule('true_ratio', self.get_positive_ratio_flag, inspector='bool')
-        self.apply_rule('true_ratio', self.get_zero_ratio_flag, inspector='bool')
+        '''Detects anomalies and returns a summary dataframe.
+
+        Rules are grouped by their (inspector, measure) filter key so that each
+        partition of the profile is visited once by every rule that targets it.
+        '''
+        for key, rules in self.plan_rules().items():
+            df = self.get_filtered_df(key[1], inspector=key[0])
+            if df.empty:
+                continue
+            df.apply(self._apply_planned_rules, 1, args=(rules,))
         
         self.ad_dataframe = self.ad_dataframe[self.ad_dataframe['anomaly_score']!=0]
         return self.summary()
-    
\ No newline at end of file
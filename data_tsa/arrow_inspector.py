@@ -0,0 +1,193 @@
+'''
+This module contains the ArrowInspector class, which computes the measures
+of the pandas-based inspectors with pyarrow.compute kernels.
+'''
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas import Timestamp
+from data_tsa.string_inspector import get_shape_counts, get_shape_ratios
+
+class ArrowInspector:
+
+    def __init__(self, array, inspector_type, statistics=None):
+        '''Inspects a pyarrow array for data quality & consistency.
+
+        Args:
+            array (pyarrow.ChunkedArray): A pyarrow array or chunked array.
+            inspector_type (str): 'string', 'number', 'bool', 'datetime' or
+                'generic'; selects the measures returned by inspect().
+            statistics (dict): Optional precomputed 'null_count', 'min_value'
+                and 'max_value', e.g. from Parquet row-group statistics.
+        '''
+        self.array = array
+        self.inspector_type = inspector_type
+        self.statistics = statistics or {}
+
+    def _count_true(self, mask):
+        '''Returns the number of True values in a boolean array.'''
+        return pc.sum(mask).as_py() or 0
+
+    def _value_counts(self):
+        '''Returns the non-null (value, count) pairs sorted by descending count.'''
+        counts = pc.value_counts(self.array)
+        pairs = [(v, c) for v, c in zip(counts.field('values').to_pylist(),
+                                        counts.field('counts').to_pylist())
+                 if v is not None]
+        pairs.sort(key=lambda _: -_[1])
+        return pairs
+
+    def get_row_count(self):
+        '''Returns the number of items.'''
+        return len(self.array)
+
+    def get_distinct_count(self):
+        '''Returns the number of distinct values, counting null as a value.'''
+        return pc.count_distinct(self.array, mode='all').as_py()
+
+    def get_null_count(self):
+        '''Returns the number of null values.'''
+        if 'null_count' in self.statistics:
+            return self.statistics['null_count']
+        return self.array.null_count
+
+    def get_null_ratio(self):
+        '''Returns the percentage of null values out of all values.'''
+        return self.get_null_count() / self.get_row_count()
+
+    def get_min_value(self):
+        '''Returns the minimum value.'''
+        if 'min_value' in self.statistics:
+            return self.statistics['min_value']
+        return pc.min_max(self.array)['min'].as_py()
+
+    def get_max_value(self):
+        '''Returns the maximum value.'''
+        if 'max_value' in self.statistics:
+            return self.statistics['max_value']
+        return pc.min_max(self.array)['max'].as_py()
+
+    def get_negative_ratio(self):
+        '''Returns the percentage of negative values out of all values.'''
+        return self._count_true(pc.less(self.array, 0)) / self.get_row_count()
+
+    def get_zero_ratio(self):
+        '''Returns the percentage of zero values out of all values.'''
+        return self._count_true(pc.equal(self.array, 0)) / self.get_row_count()
+
+    def get_mean_value(self):
+        '''Returns the mean value.'''
+        return pc.mean(self.array).as_py()
+
+    def get_median_value(self):
+        '''Returns the median value.'''
+        return pc.quantile(self.array, q=0.5, interpolation='linear')[0].as_py()
+
+    def get_stdev(self):
+        '''Returns the sample standard deviation.'''
+        return pc.stddev(self.array, ddof=1).as_py()
+
+    def get_top_five_value_counts(self):
+        '''Returns a dictionary of the top five values by count.'''
+        return dict(self._value_counts()[:5])
+
+    def get_bottom_five_value_counts(self):
+        '''Returns a dictionary of the bottom five values by count.'''
+        return dict(self._value_counts()[::-1][:5])
+
+    def get_value_skew(self):
+        '''Returns an indicator of data skew.'''
+        counts = [_[1] for _ in self._value_counts()]
+        if sum(counts[:5]) == 0:
+            return None
+        return sum(counts[::-1][:5]) / sum(counts[:5])
+
+    def get_true_ratio(self):
+        '''Returns the percentage of records that are True'''
+        value = True if pa.types.is_boolean(self.array.type) else 1
+        return self._count_true(pc.equal(self.array, value)) / self.get_row_count()
+
+    def get_false_ratio(self):
+        '''Returns the percentage of records that are False'''
+        value = False if pa.types.is_boolean(self.array.type) else 0
+        return self._count_true(pc.equal(self.array, value)) / self.get_row_count()
+
+    def get_strict_distinct_count(self):
+        '''Returns the count of normalized distinct values.'''
+        normalized = pc.utf8_trim_whitespace(pc.utf8_lower(self.array))
+        return pc.count_distinct(normalized, mode='all').as_py()
+
+    def get_empty_ratio(self):
+        '''Returns the percentage of empty ('') values out of all values.'''
+        return self._count_true(pc.equal(self.array, '')) / self.get_row_count()
+
+    def get_special_character_ratio(self):
+        '''Returns the percentage of rows with special characters out of
+        all values.
+        '''
+        mask = pc.match_substring_regex(self.array, r'[^A-Za-z0-9\s]')
+        return self._count_true(mask) / self.get_row_count()
+
+    def get_trim_required_ratio(self):
+        '''Returns the percentage of records with extra whitespace out
+        of all values.
+        '''
+        mask = pc.match_substring_regex(self.array, r'^ | $')
+        return self._count_true(mask) / self.get_row_count()
+
+    def get_shape_counts(self):
+        '''Returns the number of non-null values of each shape signature.'''
+        pairs = self._value_counts()
+        return get_shape_counts([_[0] for _ in pairs], [_[1] for _ in pairs])
+
+    def get_redundancy_indicator(self):
+        '''Returns 1 if redundant values are detected.'''
+        if self.get_distinct_count() > self.get_strict_distinct_count():
+            return 1
+        return 0
+
+    def core_inspect(self):
+        insp = {}
+        insp['row_count'] = self.get_row_count()
+        insp['distinct_count'] = self.get_distinct_count()
+        insp['null_ratio'] = self.get_null_ratio()
+        return insp
+
+    def inspect(self):
+        '''Inspects the provided array with the measures of the matching
+        pandas inspector.
+
+        Returns:
+            Dictionary containing measures and values
+        '''
+        insp = self.core_inspect()
+        if self.inspector_type == 'number':
+            insp['min_value'] = self.get_min_value()
+            insp['max_value'] = self.get_max_value()
+            insp['negative_ratio'] = self.get_negative_ratio()
+            insp['mean_value'] = self.get_mean_value()
+            insp['median_value'] = self.get_median_value()
+            insp['stdev'] = self.get_stdev()
+            insp['zero_ratio'] = self.get_zero_ratio()
+            insp['top_five_value_counts'] = self.get_top_five_value_counts()
+            insp['bottom_five_value_counts'] = self.get_bottom_five_value_counts()
+            insp['value_skew'] = self.get_value_skew()
+        elif self.inspector_type == 'bool':
+            insp['true_ratio'] = self.get_true_ratio()
+            insp['false_ratio'] = self.get_false_ratio()
+        elif self.inspector_type == 'string':
+            insp['strict_distinct_count'] = self.get_strict_distinct_count()
+            insp['empty_ratio'] = self.get_empty_ratio()
+            insp['special_character_ratio'] = self.get_special_character_ratio()
+            insp['trim_required_ratio'] = self.get_trim_required_ratio()
+            insp['redundancy_indicator'] = self.get_redundancy_indicator()
+            shape_counts = self.get_shape_counts()
+            insp['shape_count'] = len(shape_counts)
+            insp['top_shape_ratios'] = (shape_counts.iloc[:5] / self.get_row_count()).to_dict()
+            insp['shape_ratios'] = get_shape_ratios(shape_counts, self.get_row_count())
+        elif self.inspector_type == 'datetime':
+            insp['conversion_error_indicator'] = 0
+            min_value, max_value = self.get_min_value(), self.get_max_value()
+            insp['min_value'] = None if min_value is None else Timestamp(min_value)
+            insp['max_value'] = None if max_value is None else Timestamp(max_value)
+        return insp
@@ -0,0 +1,300 @@
+'''
+This module contains the ArrowProfiler class, a Profiler backend that reads
+Parquet files with pyarrow instead of materializing a pandas.DataFrame.
+'''
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pandas import concat
+from data_tsa.arrow_inspector import ArrowInspector
+from data_tsa.profiler import Profiler
+
+class ArrowProfiler(Profiler):
+
+    def __init__(self, path, slicer=None, columns=None):
+        '''Profiles the columns of a Parquet file with pyarrow.compute kernels.
+
+        Only the requested columns are read. When every row group holds a
+        single slicer value (as written by a sorted or partitioned export),
+        slices are read one at a time from their own row groups; otherwise
+        row groups are streamed and each slice is profiled once no later
+        row group can hold it. Parquet row-group statistics answer null
+        counts, and min/max values of number columns, without inspecting
+        the data when they cover a slice.
+
+        Args:
+            path (str): The path of a Parquet file.
+            slicer (str): Indicates a column containing logical ordered
+                partition, as in data_tsa.Profiler.
+            columns (list): Optional list of columns to profile. The default
+                value is every column in the file.
+        '''
+        self.parquet_file = pq.ParquetFile(path)
+        self.schema = self.parquet_file.schema_arrow
+        self.columns = list(columns or self.schema.names)
+        for column in self.columns:
+            self.validate_column(column)
+        if slicer:
+            self.validate_column(slicer)
+        self._init_attributes(slicer)
+        self._column_dtypes = {}
+
+    def validate_column(self, column):
+        '''Verifies that a column exists in the Parquet schema.
+
+        Args:
+            column (str): column name
+        '''
+        if column not in self.schema.names:
+            raise KeyError('\'{}\' not found in parquet schema!'.format(column))
+
+    def _get_read_columns(self):
+        '''Returns the profiled columns plus the slicer column.'''
+        if self.slicer and self.slicer not in self.columns:
+            return self.columns + [self.slicer]
+        return self.columns
+
+    def detect_boolean(self, array):
+        '''Return True if an array contains only null, True/1 or False/0.
+
+        Nulls in number columns are NaN in pandas, which data_tsa.Profiler
+        does not treat as boolean, so such columns are not boolean here either.
+        '''
+        non_null = pc.drop_null(array)
+        if (pa.types.is_integer(array.type) or pa.types.is_floating(array.type)) \
+                and array.null_count:
+            return False
+        if pa.types.is_boolean(array.type) or len(non_null) == 0:
+            return True
+        if pa.types.is_integer(array.type) or pa.types.is_floating(array.type):
+            return pc.all(pc.is_in(non_null, value_set=pa.array([0, 1],
+                                                            type=array.type))).as_py()
+        if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+            return pc.all(pc.equal(non_null, '')).as_py()
+        return False
+
+    def detect_boolean_statistics(self, column):
+        '''Detects boolean number columns from row-group statistics.
+
+        Returns:
+            True or False when the statistics decide it, else None.
+        '''
+        dtype = self.schema.field(column).type
+        if not (pa.types.is_integer(dtype) or pa.types.is_floating(dtype)):
+            return None
+        stats = [self._get_column_statistics(i, column)
+                 for i in range(self.parquet_file.num_row_groups)]
+        if not stats or any(_ is None for _ in stats):
+            return None
+        if any(_.null_count for _ in stats):
+            return False
+        if min(_.min for _ in stats) < 0 or max(_.max for _ in stats) > 1:
+            return False
+        return True if pa.types.is_integer(dtype) else None
+
+    def get_column_dtype(self, column, array=None):
+        '''Returns the simple type of the provided column.
+
+        Args:
+            column (str): column name
+            array (pyarrow.ChunkedArray): a sample of the column, used to
+                detect boolean values on first use when the row-group
+                statistics cannot.
+
+        Returns:
+            'string', 'number', 'bool', 'datetime' or 'generic'
+        '''
+        type_exception = self.get_type_exception(column)
+        if type_exception:
+            return type_exception
+        if column not in self._column_dtypes:
+            dtype = self.schema.field(column).type
+            boolean = self.detect_boolean_statistics(column)
+            if boolean is None:
+                boolean = array is not None and self.detect_boolean(array)
+            if boolean:
+                self._column_dtypes[column] = 'bool'
+            elif pa.types.is_string(dtype) or pa.types.is_large_string(dtype):
+                self._column_dtypes[column] = 'string'
+            elif pa.types.is_timestamp(dtype):
+                self._column_dtypes[column] = 'datetime'
+            elif pa.types.is_integer(dtype) or pa.types.is_floating(dtype):
+                self._column_dtypes[column] = 'number'
+            else:
+                self._column_dtypes[column] = 'generic'
+        return self._column_dtypes[column]
+
+    def detect_column_dtypes(self):
+        '''Resolves the type of every profiled column before profiling.
+
+        Types come from the schema and row-group statistics; only when those
+        cannot tell a boolean column apart is the first row group inspected,
+        so the file is not read twice.
+        '''
+        sample = None
+        if self.parquet_file.num_row_groups:
+            sample = self.parquet_file.read_row_group(0, columns=self.columns)
+        for col in self.columns:
+            self.get_column_dtype(col, None if sample is None else sample.column(col))
+
+    def _get_column_statistics(self, row_group, column):
+        '''Returns the Parquet statistics of a column in a row group, or None.'''
+        metadata = self.parquet_file.metadata.row_group(row_group)
+        for i in range(metadata.num_columns):
+            chunk = metadata.column(i)
+            if chunk.path_in_schema == column:
+                if chunk.statistics is None or not chunk.statistics.has_min_max:
+                    return None
+                return chunk.statistics
+        return None
+
+    def get_slice_row_groups(self):
+        '''Maps each slice to its row groups.
+
+        Returns:
+            A dictionary of slicer value to row group indexes, or None when
+            any row group lacks statistics or holds more than one slice.
+        '''
+        slice_row_groups = {}
+        for i in range(self.parquet_file.num_row_groups):
+            stats = self._get_column_statistics(i, self.slicer)
+            if stats is None or stats.min != stats.max or stats.null_count:
+                return None
+            slice_row_groups.setdefault(stats.min, []).append(i)
+        return slice_row_groups
+
+    def get_statistics(self, row_groups, column):
+        '''Combines the row-group statistics of a column.
+
+        Args:
+            row_groups (list): The row group indexes of a slice.
+            column (str): column name
+
+        Returns:
+            Dictionary with 'null_count', plus 'min_value' and 'max_value'
+            for number columns, or an empty dictionary when any row group
+            lacks statistics.
+        '''
+        stats = [self._get_column_statistics(i, column) for i in row_groups]
+        if not stats or any(_ is None for _ in stats):
+            return {}
+        statistics = {'null_count': sum(_.null_count for _ in stats)}
+        if self.get_column_dtype(column) == 'number':
+            statistics['min_value'] = min(_.min for _ in stats)
+            statistics['max_value'] = max(_.max for _ in stats)
+        return statistics
+
+    def profile_table(self, table, slice_value, row_groups=None):
+        '''Profiles a pyarrow.Table, usually a sliced partition.
+
+        Args:
+            table (pyarrow.Table): A pyarrow.Table
+            slice_value (str): The slicer value for a given partition.
+            row_groups (list): Optional row group indexes that hold exactly
+                this partition; their statistics are used when available.
+
+        Returns:
+            A pandas.DataFrame in the data_tsa.Profiler result format.
+        '''
+        output_columns = ['inspector',
+                          'column',
+                          'slice',
+                          'measure',
+                          'measure_value']
+        result = []
+        for col in self.columns:
+            inspector_type = self.get_column_dtype(col)
+            statistics = {}
+            if row_groups is not None and inspector_type != 'bool':
+                statistics = self.get_statistics(row_groups, col)
+            insp = ArrowInspector(table.column(col), inspector_type, statistics)
+            df = self.insp_dict_to_dataframe(col, insp.inspect())
+            df['inspector'] = inspector_type
+            df['slice'] = slice_value
+            result.append(df[output_columns])
+        return concat(result)
+
+    def iter_slice_tables(self, columns):
+        '''Yields (slice, table) pairs from row groups that may hold several slices.
+
+        Row groups are read one at a time. Rows of a slice are buffered
+        until the slicer statistics show that no later row group can hold
+        that slice, so with data sorted by the slicer only the slices of the
+        current row group are in memory. Without statistics every slice is
+        buffered until the last row group.
+
+        Args:
+            columns (list): The columns to read, including the slicer.
+        '''
+        num_row_groups = self.parquet_file.num_row_groups
+        # bounds[i] is (known, lowest slicer value of the row groups after i)
+        bounds = []
+        known, lowest = True, None
+        for i in reversed(range(num_row_groups)):
+            bounds.append((known, lowest))
+            stats = self._get_column_statistics(i, self.slicer)
+            if stats is None:
+                known = False
+            elif lowest is None or stats.min < lowest:
+                lowest = stats.min
+        bounds.reverse()
+
+        pending = {}
+        for i in range(num_row_groups):
+            group = self.parquet_file.read_row_group(i, columns=columns)
+            slicer = group.column(self.slicer)
+            for s in pc.unique(slicer).to_pylist():
+                if s is not None:
+                    pending.setdefault(s, []).append(group.filter(pc.equal(slicer, s)))
+            known, lowest = bounds[i]
+            if not known:
+                continue
+            for s in sorted(_ for _ in pending if lowest is None or _ < lowest):
+                yield s, pa.concat_tables(pending.pop(s))
+        for s in sorted(pending):
+            yield s, pa.concat_tables(pending.pop(s))
+
+    def profile(self, lags=3):
+        '''Performs a column-wise evaluation of the columns in the Parquet file.
+
+        Args:
+            lags (int): The number of lagging measure values to be added to
+                the output table
+
+        Returns:
+            dataframe: A dataframe containing summary measures for each column.
+        '''
+        read_columns = self._get_read_columns()
+        self.detect_column_dtypes()
+
+        if not self.slicer:
+            table = self.parquet_file.read(columns=read_columns)
+            row_groups = list(range(self.parquet_file.num_row_groups))
+            self.result = self.profile_table(table, None, row_groups)
+            return self.result
+
+        slice_row_groups = self.get_slice_row_groups()
+        result = []
+        if slice_row_groups is None:
+            for s, table in self.iter_slice_tables(read_columns):
+                result.append(self.profile_table(table, s))
+        else:
+            slices = sorted(slice_row_groups)
+            for i, s in enumerate(slices):
+                print(i + 1, '/', len(slices))
+                row_groups = slice_row_groups[s]
+                table = self.parquet_file.read_row_groups(row_groups, columns=read_columns)
+                result.append(self.profile_table(table, s, row_groups))
+
+        result = concat(result).sort_values(['inspector',
+                                             'column',
+                                             'measure',
+                                             'slice'])
+
+        if lags:
+            result = self.get_lags(result, lags)
+
+        self.result = result
+
+        return result
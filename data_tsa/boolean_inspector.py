@@ -1,4 +1,5 @@
 from data_tsa.inspector import Inspector
+from data_tsa.summary_kernel import summarize
 
 class BooleanInspector(Inspector):
 
@@ -9,14 +10,32 @@ class BooleanInspector(Inspector):
             series (pandas.Series): A pandas.Series object
         '''
         super().__init__(series)
+        self._summary = None
+
+    def get_summary(self):
+        '''Returns the fused single-pass summary of the series.
+
+        The summary is computed once and shares one pass between the null,
+        true and false counts, without filtered copies of the series.
+        '''
+        if self._summary is None:
+            self._summary = summarize(self.series.values)
+        return self._summary
+
+    def get_null_ratio(self):
+        '''Returns the percentage of numpy.NaN values out of all values.'''
+        summary = self.get_summary()
+        return summary['null_count'] / summary['row_count']
         
     def get_true_ratio(self):
         '''Returns the percentage of records that are True'''
-        return len(self.series[self.series==True]) / len(self.series)
+        summary = self.get_summary()
+        return summary['true_count'] / summary['row_count']
     
     def get_false_ratio(self):
         '''Returns the percentage of records that are False'''
-        return len(self.series[self.series==False]) / len(self.series)
+        summary = self.get_summary()
+        return summary['false_count'] / summary['row_count']
     
     def inspect(self):
         '''Inspects the provided pandas.Series
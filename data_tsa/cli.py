@@ -0,0 +1,364 @@
+'''
+This module contains the data-tsa command line interface.
+
+The profile command profiles files, directories of files, or partitioned
+dataset directories, and writes the measures of every slice as soon as the
+slice is done. The detect command detects anomalies in a profile written
+by the profile command. Both commands write CSV files, or directories of
+Parquet part files, and can resume an interrupted run.
+
+Usage:
+    data-tsa profile data/orders.csv --slicer order_date --output profile.csv
+    data-tsa profile data/orders --slicer day --workers 8 --output profile
+    data-tsa detect profile.csv --slices 2021-01-04 2021-01-05 --output anomalies.csv
+
+'''
+
+import argparse
+import sys
+from collections import deque
+from json import dumps, loads
+from os import fsync, listdir, makedirs, remove, replace
+from os.path import exists, isdir, join
+import numpy as np
+from pandas import DataFrame, NaT, concat, read_csv, read_parquet
+from pandas.errors import EmptyDataError
+from data_tsa.anomaly_detector import AnomalyDetector
+from data_tsa.dataset_profiler import DatasetProfiler, read_partition
+from data_tsa.prefetch_reader import PrefetchReader
+from data_tsa.profiler import Profiler
+
+def _plain(value):
+    '''Converts a measure value to JSON-serializable Python objects.'''
+    if isinstance(value, dict):
+        return {_plain_key(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(_) for _ in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is NaT:
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def _plain_key(key):
+    '''Converts a dictionary key to a JSON-serializable key.'''
+    key = _plain(key)
+    return key if key is None or isinstance(key, (str, int, float, bool)) else str(key)
+
+def encode_value(value):
+    '''Returns a measure value as a JSON string.'''
+    return dumps(_plain(value))
+
+def decode_value(value):
+    '''Returns the measure value of a JSON string written by encode_value().'''
+    return loads(value) if isinstance(value, str) else None
+
+def get_measure_columns(columns):
+    '''Returns the measure value and lag columns of a profile, which are written as JSON.'''
+    return [_ for _ in columns if _ == 'measure_value' or
+            (_.startswith('l') and _.endswith('_measure_value'))]
+
+def get_part_names(path):
+    '''Returns the sorted names of the Parquet parts in a directory.'''
+    return sorted(_ for _ in listdir(path) if _.startswith('part-') and _.endswith('.parquet'))
+
+def read_result(path, encoded_columns=()):
+    '''Reads the rows written by a ResultWriter, with JSON columns still encoded.'''
+    if path.endswith('.csv'):
+        try:
+            # converters keep the JSON strings raw, e.g. 'null' is not read as NaN
+            return read_csv(path, converters={_: str for _ in encoded_columns})
+        except EmptyDataError:
+            return DataFrame()
+    parts = get_part_names(path)
+    if not parts:
+        return DataFrame()
+    return concat([read_parquet(join(path, _)) for _ in parts], ignore_index=True)
+
+class ResultWriter:
+
+    def __init__(self, path, encoded_columns=(), resume=False):
+        '''Appends result rows to a CSV file or a directory of Parquet parts.
+
+        Rows are written one slice at a time, so an interrupted run loses at
+        most the slice being written. Parquet parts are written under a
+        temporary name and renamed once complete. A CSV file may end in a
+        partially written slice, so on resume the rows of its last slice
+        are dropped and that slice is written again.
+
+        Args:
+            path (str): A '.csv' file, or else a directory of Parquet parts.
+            encoded_columns (list): Columns written as JSON strings, so that
+                mixed-type values keep their types and a uniform schema.
+            resume (bool): Keep the rows written by an earlier run. Otherwise
+                earlier output is removed.
+        '''
+        self.path = path
+        self.csv = path.endswith('.csv')
+        self.encoded_columns = list(encoded_columns)
+        self.columns = None
+        self.parts = 0
+        self.written = DataFrame()
+        if resume and exists(path):
+            self.written = self._recover()
+        elif self.csv and exists(path):
+            remove(path)
+        elif not self.csv and isdir(path):
+            for name in get_part_names(path):
+                remove(join(path, name))
+        if not self.csv:
+            makedirs(path, exist_ok=True)
+
+    def _recover(self):
+        '''Returns the decoded rows of an earlier run, without partial slices.'''
+        if self.csv:
+            with open(self.path, 'rb+') as f:
+                content = f.read()
+                f.truncate(content.rfind(b'\n') + 1)
+            dataframe = read_result(self.path, self.encoded_columns)
+            if len(dataframe):
+                dataframe = dataframe[dataframe['slice'] != dataframe['slice'].iloc[-1]]
+            if dataframe.empty:
+                remove(self.path)
+                return DataFrame()
+            dataframe.to_csv(self.path, index=False)
+        else:
+            self.parts = len(get_part_names(self.path))
+            dataframe = read_result(self.path, self.encoded_columns)
+            if dataframe.empty:
+                return dataframe
+        self.columns = list(dataframe.columns)
+        for column in self.encoded_columns:
+            dataframe[column] = dataframe[column].map(decode_value)
+        return dataframe
+
+    def get_written_slices(self):
+        '''Returns the string values of the slices written by an earlier run.'''
+        if self.written.empty:
+            return set()
+        return set(self.written['slice'].astype(str))
+
+    def write(self, dataframe):
+        '''Appends rows, usually the rows of one slice.'''
+        if dataframe.empty:
+            return
+        if self.columns is None:
+            self.columns = list(dataframe.columns)
+        elif list(dataframe.columns) != self.columns:
+            raise ValueError('The columns {} do not match the existing output columns {}.'
+                             .format(list(dataframe.columns), self.columns))
+        dataframe = dataframe.copy()
+        for column in self.encoded_columns:
+            dataframe[column] = dataframe[column].map(encode_value)
+        if self.csv:
+            with open(self.path, 'a', newline='') as f:
+                dataframe.to_csv(f, header=f.tell() == 0, index=False)
+                f.flush()
+                fsync(f.fileno())
+        else:
+            name = 'part-{:05d}.parquet'.format(self.parts)
+            dataframe.to_parquet(join(self.path, '.' + name), index=False)
+            replace(join(self.path, '.' + name), join(self.path, name))
+            self.parts += 1
+
+class LagHistory:
+
+    def __init__(self, lags):
+        '''Keeps the last measure values of every measure series.
+
+        Replaces Profiler.get_lags() when slices are profiled and written
+        one at a time: only `lags` values per series are kept in memory.
+
+        Args:
+            lags (int): The number of lagging measure values.
+        '''
+        self.lags = lags
+        self.series = {}
+
+    def update(self, dataframe):
+        '''Records the measure values of a slice.'''
+        for key, value in zip(zip(dataframe['inspector'], dataframe['column'],
+                                  dataframe['measure']),
+                              dataframe['measure_value']):
+            self.series.setdefault(key, deque(maxlen=self.lags)).append(value)
+
+    def add_lags(self, dataframe):
+        '''Adds lag columns to the measures of the next slice and records it.'''
+        keys = list(zip(dataframe['inspector'], dataframe['column'], dataframe['measure']))
+        for i in range(1, self.lags + 1):
+            column = 'l{}_measure_value'.format(i)
+            values = []
+            for key in keys:
+                history = self.series.get(key, ())
+                values.append(history[-i] if len(history) >= i else None)
+            dataframe[column] = values
+        self.update(dataframe)
+        return dataframe
+
+def get_input_files(paths):
+    '''Expands files and directories into a sorted list of CSV and Parquet files.'''
+    files = []
+    for path in paths:
+        if isdir(path):
+            files.extend(sorted(join(path, _) for _ in listdir(path)
+                                if _.endswith('.csv') or _.endswith('.parquet')))
+        else:
+            files.append(path)
+    return files
+
+def is_partitioned(path, slicer):
+    '''Returns True if a directory holds '<slicer>=<value>' partitions.'''
+    prefix = '{}='.format(slicer)
+    return isdir(path) and any(_.startswith(prefix) and isdir(join(path, _))
+                               for _ in listdir(path))
+
+def set_type_exceptions(profiler, types):
+    '''Applies 'column=dtype' type exceptions to a profiler.'''
+    for item in types or []:
+        column, _, dtype = item.partition('=')
+        profiler.set_type_exception(column, dtype)
+
+def iter_profiles(args, written):
+    '''Profiles the inputs, yielding (slice_value, dataframe) for every slice
+    that is not already written.'''
+    if len(args.inputs) == 1 and is_partitioned(args.inputs[0], args.slicer):
+        profiler = DatasetProfiler(args.inputs[0], args.slicer, start=args.start, end=args.end,
+                                   columns=args.columns, workers=args.workers)
+        set_type_exceptions(profiler, args.types)
+        partitions = [_ for _ in profiler.partitions if str(_[0]) not in written]
+        yield from profiler.iter_profile(partitions)
+        return
+
+    files = get_input_files(args.inputs)
+    if not files:
+        raise ValueError('No CSV or Parquet files found in {}'.format(', '.join(args.inputs)))
+    if args.chunk_size:
+        source = files[0] if len(files) == 1 else [[_] for _ in files]
+        reader = PrefetchReader(source, chunk_size=args.chunk_size, workers=args.workers,
+                                memory_budget=args.memory_budget, columns=args.columns)
+        sample = reader.peek()
+    else:
+        reader = None
+        sample = read_partition(files, args.columns)
+    if sample is None:
+        raise ValueError('No rows to profile.')
+    profiler = Profiler(sample, slicer=args.slicer)
+    set_type_exceptions(profiler, args.types)
+    chunks = reader if reader is not None else [sample]
+    chunks = (_[~_[args.slicer].astype(str).isin(written)] for _ in chunks)
+    try:
+        yield from profiler.iter_profile_stream(chunks)
+    finally:
+        if reader is not None:
+            reader.close()
+            if args.stats:
+                print_reader_stats(reader.stats())
+
+def print_reader_stats(stats):
+    '''Writes the throughput and wait times of a PrefetchReader to stderr.'''
+    print('read {chunks} chunks, {rows} rows, {bytes} bytes in {read_seconds:.2f}s; '
+          'readers waited {reader_wait_seconds:.2f}s, profiling waited '
+          '{consumer_wait_seconds:.2f}s ({bound} bound)'.format(**stats), file=sys.stderr)
+
+def run_profile(args):
+    '''Runs the profile command.'''
+    columns = ['measure_value'] + ['l{}_measure_value'.format(i) for i in range(1, args.lags + 1)]
+    writer = ResultWriter(args.output, columns, resume=args.resume)
+    history = LagHistory(args.lags)
+    if not writer.written.empty:
+        history.update(writer.written)
+    written = writer.get_written_slices()
+    for _, dataframe in iter_profiles(args, written):
+        if args.measures:
+            dataframe = dataframe[dataframe['measure'].isin(args.measures)]
+        dataframe = dataframe.sort_values(['inspector', 'column', 'measure'])
+        writer.write(history.add_lags(dataframe.reset_index(drop=True)))
+    return 0
+
+def read_profile(path):
+    '''Reads a profile written by the profile command into a data_tsa.Profiler.'''
+    if path.endswith('.csv'):
+        columns = get_measure_columns(read_csv(path, nrows=0).columns)
+    else:
+        columns = ['measure_value']
+    result = read_result(path, columns)
+    if result.empty:
+        raise ValueError('No profile found at {}'.format(path))
+    for column in get_measure_columns(result.columns):
+        result[column] = result[column].map(decode_value)
+    profiler = Profiler(result[['slice']], slicer='slice')
+    profiler.result = result
+    return profiler
+
+def run_detect(args):
+    '''Runs the detect command.'''
+    profiler = read_profile(args.profile)
+    slices = sorted(profiler.result['slice'].unique().tolist())
+    if args.slices:
+        targets = [_ for _ in slices if str(_) in args.slices]
+        missing = set(args.slices) - set(str(_) for _ in targets)
+        if missing:
+            raise ValueError('Slices not found in the profile: {}'.format(', '.join(sorted(missing))))
+    else:
+        targets = slices[-1:]
+    writer = ResultWriter(args.output, ['reference_lags'], resume=args.resume)
+    written = writer.get_written_slices()
+    for target in targets:
+        if str(target) in written:
+            continue
+        detector = AnomalyDetector(profiler, target_slice=target)
+        detector.detect()
+        writer.write(detector.ad_dataframe.reset_index(drop=True))
+    return 0
+
+def get_parser():
+    '''Returns the argument parser of the data-tsa command.'''
+    parser = argparse.ArgumentParser(prog='data-tsa', description=__doc__.split('\n\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    profile = commands.add_parser('profile', help='profile files or a partitioned dataset')
+    profile.add_argument('inputs', nargs='+',
+                         help='CSV or Parquet files, directories of files, or a '
+                              'directory of \'<slicer>=<value>\' partitions')
+    profile.add_argument('--slicer', required=True,
+                         help='the slicer column, or the partition key')
+    profile.add_argument('--output', required=True,
+                         help='a .csv file, or else a directory of Parquet parts')
+    profile.add_argument('--lags', type=int, default=3)
+    profile.add_argument('--measures', nargs='+', help='only write these measures')
+    profile.add_argument('--columns', nargs='+', help='only read and profile these columns')
+    profile.add_argument('--types', nargs='+', metavar='COLUMN=TYPE',
+                         help='type exceptions, e.g. store_id=string')
+    profile.add_argument('--workers', type=int, default=1,
+                         help='worker processes for partitions, or reader threads for files')
+    profile.add_argument('--chunk-size', type=int,
+                         help='stream files in chunks of rows; files must be sorted by the slicer')
+    profile.add_argument('--memory-budget', type=int,
+                         help='the bytes of prefetched chunks when streaming')
+    profile.add_argument('--stats', action='store_true',
+                         help='write the read and wait times of streaming to stderr')
+    profile.add_argument('--start', help='the lowest partition value to profile')
+    profile.add_argument('--end', help='the highest partition value to profile')
+    profile.add_argument('--resume', action='store_true',
+                         help='skip the slices already written to the output')
+    profile.set_defaults(run=run_profile)
+
+    detect = commands.add_parser('detect', help='detect anomalies in a profile')
+    detect.add_argument('profile', help='a profile written by the profile command')
+    detect.add_argument('--output', required=True,
+                        help='a .csv file, or else a directory of Parquet parts')
+    detect.add_argument('--slices', nargs='+',
+                        help='the slices to evaluate; the default is the last slice')
+    detect.add_argument('--resume', action='store_true',
+                        help='skip the slices already written to the output')
+    detect.set_defaults(run=run_detect)
+    return parser
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    return args.run(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
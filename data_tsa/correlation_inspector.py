@@ -0,0 +1,71 @@
+'''
+This module contains the CorrelationInspector class, which inspects the
+relationships between the numeric columns of a pandas.DataFrame.
+'''
+
+import numpy as np
+
+class CorrelationInspector:
+
+    def __init__(self, dataframe):
+        '''Inspects the numeric columns of a pandas.DataFrame together.
+
+        Every pairwise measure is computed for all columns at once with a
+        few matrix products, rather than by looping over column pairs.
+
+        Args:
+            dataframe (pandas.DataFrame): A pandas.DataFrame containing only
+                numeric columns.
+        '''
+        self.columns = list(dataframe.columns)
+        self.values = dataframe.values.astype(float)
+        self.nulls = np.isnan(self.values)
+
+    def get_correlation_matrix(self):
+        '''Returns the Pearson correlation matrix of the columns.
+
+        Each pair is computed over the rows where both values are non-null.
+        Pairs with fewer than two such rows, or a constant column, are NaN.
+        '''
+        present = (~self.nulls).astype(float)
+        # centering first keeps the sums small, and constant columns exactly 0
+        counts = present.sum(axis=0)
+        x = np.where(self.nulls, 0, self.values)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = np.where(counts > 0, x.sum(axis=0) / counts, 0)
+        x = np.where(self.nulls, 0, x - means)
+        n = present.T @ present
+        sums = x.T @ present
+        square_sums = (x * x).T @ present
+        products = x.T @ x
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = products - sums * sums.T / n
+            variance = square_sums - sums * sums / n
+            correlation = covariance / np.sqrt(variance * variance.T)
+        correlation[n < 2] = np.nan
+        return np.clip(correlation, -1, 1)
+
+    def get_null_cooccurrence_matrix(self):
+        '''Returns the percentage of rows where both columns are null.
+
+        The diagonal holds the null ratio of each column.
+        '''
+        nulls = self.nulls.astype(float)
+        return (nulls.T @ nulls) / len(self.values)
+
+    def inspect(self):
+        '''Inspects every pair of columns.
+
+        Returns:
+            Dictionary mapping 'a:b' column pairs to dictionaries containing
+            measures and values
+        '''
+        correlation = self.get_correlation_matrix()
+        cooccurrence = self.get_null_cooccurrence_matrix()
+        insp = {}
+        for i, j in zip(*np.triu_indices(len(self.columns), 1)):
+            value = correlation[i, j]
+            pair = '{}:{}'.format(self.columns[i], self.columns[j])
+            insp[pair] = {'correlation': None if np.isnan(value) else float(value),
+                          'null_cooccurrence_ratio': float(cooccurrence[i, j])}
+        return insp
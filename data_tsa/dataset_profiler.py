@@ -0,0 +1,161 @@
+'''
+This module contains the DatasetProfiler class, which profiles Hive-style
+partitioned dataset directories (e.g. 'dt=2019-01-01/part-0.parquet') with
+one partition per slice.
+'''
+
+from multiprocessing import Pool
+from os import listdir
+from os.path import isdir, join
+from pandas import concat, read_csv, read_parquet
+from data_tsa.profiler import Profiler
+
+def read_partition(files, columns=None):
+    '''Reads the Parquet or CSV files of a partition into one pandas.DataFrame.
+
+    Args:
+        files (list): The file paths of the partition.
+        columns (list): Optional list of columns to read.
+    '''
+    frames = []
+    for f in files:
+        if f.endswith('.csv'):
+            frames.append(read_csv(f, usecols=columns))
+        else:
+            frames.append(read_parquet(f, columns=columns))
+    return concat(frames, ignore_index=True)
+
+def _profile_partition(task):
+    '''Profiles a single partition in a worker process.'''
+    files, slice_value, columns, column_dtypes, reader = task
+    dataframe = reader(files, columns)
+    profiler = Profiler(dataframe)
+    for column, dtype in column_dtypes.items():
+        if column in dataframe.columns:
+            profiler.set_type_exception(column, dtype)
+    return profiler.profile_dataframe(dataframe, slice_value)
+
+class DatasetProfiler(Profiler):
+
+    def __init__(self, path, partition_key, start=None, end=None, columns=None,
+                 workers=None, max_tasks_per_worker=None, reader=read_partition):
+        '''Profiles a partitioned dataset directory, one partition per slice.
+
+        Partitions are profiled in parallel worker processes. Each worker
+        reads and profiles one partition at a time, so its memory is bounded
+        by the largest partition; max_tasks_per_worker recycles workers to
+        return that memory to the system.
+
+        Args:
+            path (str): The dataset root containing '<partition_key>=<value>'
+                directories.
+            partition_key (str): The partition key, used as the slicer.
+            start (str): Optional lowest partition value to profile.
+            end (str): Optional highest partition value to profile.
+            columns (list): Optional list of columns to read and profile.
+            workers (int): The number of worker processes. The default value
+                is the number of CPUs; 1 profiles in the current process.
+            max_tasks_per_worker (int): Optional number of partitions a worker
+                profiles before it is replaced.
+            reader (function): A picklable function(files, columns) returning
+                a pandas.DataFrame. The default reads Parquet and CSV files.
+        '''
+        self.path = path
+        self._init_attributes(partition_key)
+        self.columns = columns
+        self.workers = workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.reader = reader
+        self.partitions = self.get_partitions(start, end)
+        if not self.partitions:
+            raise ValueError('No \'{}\' partitions found in {}'.format(partition_key, path))
+        self.dataframe = reader(self.partitions[0][1], columns)
+
+    def get_partitions(self, start=None, end=None):
+        '''Returns the sorted (value, files) partitions within [start, end].'''
+        prefix = '{}='.format(self.slicer)
+        partitions = []
+        for name in listdir(self.path):
+            directory = join(self.path, name)
+            if not name.startswith(prefix) or not isdir(directory):
+                continue
+            value = name[len(prefix):]
+            if (start is not None and value < start) or (end is not None and value > end):
+                continue
+            files = sorted(join(directory, _) for _ in listdir(directory)
+                           if _.endswith('.parquet') or _.endswith('.csv'))
+            if files:
+                partitions.append((value, files))
+        partitions.sort()
+        return partitions
+
+    def get_slicer_values(self):
+        '''Returns a sorted list of partition values.'''
+        return [_[0] for _ in self.partitions]
+
+    def profile(self, lags=3):
+        '''Profiles every partition and returns the concatenated result.
+
+        Column types are resolved once from the first partition (and any
+        type exceptions) and shared with the workers, so that every slice of
+        a column is profiled by the same inspector.
+
+        Args:
+            lags (int): The number of lagging measure values to be added to
+                the output table
+
+        Returns:
+            dataframe: A dataframe containing summary measures for each column.
+        '''
+        result = []
+        for i, (_, df) in enumerate(self.iter_profile()):
+            print(i + 1, '/', len(self.partitions))
+            result.append(df)
+
+        result = concat(result).sort_values(['inspector',
+                                             'column',
+                                             'measure',
+                                             'slice'])
+
+        if lags:
+            result = self.get_lags(result, lags)
+
+        self.result = result
+
+        return result
+
+    def iter_profile(self, partitions=None):
+        '''Profiles partitions in order, yielding each as soon as it is done.
+
+        Args:
+            partitions (list): Optional (value, files) partitions to profile.
+                The default value is self.partitions.
+
+        Yields:
+            (partition_value, dataframe) tuples of the measures of each
+            partition, without lags.
+        '''
+        partitions = self.partitions if partitions is None else partitions
+        column_dtypes = {col: self.get_column_dtype(col) for col in self.dataframe.columns}
+        tasks = [(files, value, self.columns, column_dtypes, self.reader)
+                 for value, files in partitions]
+
+        if self.workers == 1:
+            results = map(_profile_partition, tasks)
+            pool = None
+        else:
+            pool = Pool(self.workers, maxtasksperchild=self.max_tasks_per_worker)
+            results = pool.imap(_profile_partition, tasks)
+
+        done = False
+        try:
+            for (value, _), df in zip(partitions, results):
+                yield value, df
+            done = True
+        finally:
+            if pool and done:
+                pool.close()
+                pool.join()
+            elif pool:
+                # the remaining tasks are already queued; don't wait for them
+                pool.terminate()
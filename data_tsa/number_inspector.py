@@ -9,6 +9,7 @@ Attributes:
 
 import numpy as np
 from data_tsa.inspector import Inspector
+from data_tsa.summary_kernel import summarize
 
 number_dtypes = [np.int,
                  np.int0,
@@ -28,17 +29,57 @@ float_dtypes =  [np.float,
 
 class NumberInspector(Inspector):
 
-    def __init__(self, series):
+    def __init__(self, series, bin_edges=None):
         '''Inspects a numerical pandas.Series object for quality & consistency.
 
         Args:
             series (pandas.Series): A pandas.Series object
+            bin_edges (numpy.ndarray): Optional, monotonically increasing
+                histogram bin edges. When provided, inspect() includes a
+                'histogram_sketch' measure.
         '''
         super().__init__(series)
+        self.bin_edges = bin_edges
+        self._summary = None
+
+    def get_summary(self):
+        '''Returns the fused single-pass summary of a numeric series, or None.
+
+        The summary is computed once and shared by the count, null, min/max,
+        ratio, mean and stdev measures. Object series, e.g. from a type
+        exception, return None and use the pandas methods.
+        '''
+        if self._summary is None and self.series.dtype.kind in 'biuf':
+            self._summary = summarize(self.series.values)
+        return self._summary
+
+    def get_null_ratio(self):
+        '''Returns the percentage of numpy.NaN values out of all values.'''
+        summary = self.get_summary()
+        if summary is None:
+            return super().get_null_ratio()
+        return summary['null_count'] / summary['row_count']
+
+    def get_min_value(self):
+        '''Returns the minimum value.'''
+        summary = self.get_summary()
+        if summary is None:
+            return super().get_min_value()
+        return summary['min_value']
+
+    def get_max_value(self):
+        '''Returns the maximum value.'''
+        summary = self.get_summary()
+        if summary is None:
+            return super().get_max_value()
+        return summary['max_value']
 
     def get_negative_ratio(self):
         '''Returns the percentage of negative values out of all values.'''
-        return self.series[self.series < 0].count() / self.get_row_count()
+        summary = self.get_summary()
+        if summary is None:
+            return self.series[self.series < 0].count() / self.get_row_count()
+        return summary['negative_count'] / summary['row_count']
 
     def get_float_indicator(self):
         '''Returns True if the series dtype is a float.'''
@@ -46,7 +87,10 @@ class NumberInspector(Inspector):
 
     def get_mean_value(self):
         '''Returns the mean value of the series.'''
-        return self.series.mean()
+        summary = self.get_summary()
+        if summary is None:
+            return self.series.mean()
+        return summary['mean_value']
 
     def get_median_value(self):
         '''Returns the median value of the series.'''
@@ -58,11 +102,19 @@ class NumberInspector(Inspector):
 
     def get_stdev(self):
         '''Returns the standard deviation of the series.'''
-        return self.series.std()
+        summary = self.get_summary()
+        if summary is None:
+            return self.series.std()
+        if summary['count'] < 2:
+            return np.nan
+        return np.sqrt(summary['m2'] / (summary['count'] - 1))
 
     def get_zero_ratio(self):
         '''Returns the percentage of zero values out of all values.'''
-        return self.series[self.series == 0].count() / self.get_row_count()
+        summary = self.get_summary()
+        if summary is None:
+            return self.series[self.series == 0].count() / self.get_row_count()
+        return summary['zero_count'] / summary['row_count']
 
     def get_top_five_value_counts(self):
         '''Returns a dictionary of the top five values by count.'''
@@ -79,6 +131,13 @@ class NumberInspector(Inspector):
         return  sum(self.series.value_counts().nsmallest(5)) \
                 /sum(self.series.value_counts().nlargest(5))
 
+    def get_histogram_sketch(self):
+        '''Returns a list of non-null value counts per bin of self.bin_edges.'''
+        values = self.series.values.astype(float)
+        values = values[~np.isnan(values)]
+        counts, _ = np.histogram(values, bins=self.bin_edges)
+        return counts.tolist()
+
     def inspect(self):
         '''Inspects the provided pandas.Series
 
@@ -98,4 +157,6 @@ class NumberInspector(Inspector):
         insp['top_five_value_counts'] = self. get_top_five_value_counts()
         insp['bottom_five_value_counts'] = self.get_bottom_five_value_counts()
         insp['value_skew'] = self.get_value_skew()
+        if self.bin_edges is not None:
+            insp['histogram_sketch'] = self.get_histogram_sketch()
         return insp
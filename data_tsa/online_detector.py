@@ -0,0 +1,194 @@
+'''
+This module contains the OnlineDetector class, which scores one profiled
+slice at a time against compact rolling state instead of lag columns.
+'''
+
+from collections import deque
+from json import dump, load
+from math import isnan, sqrt
+from numbers import Number
+from os.path import exists
+from pandas import DataFrame
+
+class OnlineDetector:
+
+    def __init__(self, window=3, alpha=0.3, threshold=3, state_path=None):
+        '''Detects anomalies incrementally from a rolling per-measure state.
+
+        For every (inspector, column, measure) the detector keeps a ring
+        buffer of the last `window` values, an exponentially weighted mean
+        and variance, and the running min and max. Each call to update()
+        scores the new slice against that state in constant time per measure
+        and then folds the new values into it.
+
+        Args:
+            window (int): The number of recent values kept per measure.
+            alpha (float): The EWMA smoothing factor, between 0 and 1.
+            threshold (float): The EWMA z-score above which a value is flagged.
+            state_path (str): Optional path of a JSON state file. When the
+                file exists the state is loaded from it.
+        '''
+        if not 0 < alpha <= 1:
+            raise ValueError('\'alpha\' must be greater than 0 and at most 1.')
+        self.window = window
+        self.alpha = alpha
+        self.threshold = threshold
+        self.state_path = state_path
+        self.state = {}
+        self.ad_dataframe = DataFrame(columns=['inspector',
+                                               'column',
+                                               'slice',
+                                               'measure',
+                                               'rule',
+                                               'reference_lags',
+                                               'flag',
+                                               'anomaly_score'])
+        if state_path and exists(state_path):
+            self.load(state_path)
+
+    def _get_key(self, inspector, column, measure):
+        '''Returns the state key of a measure.'''
+        return '|'.join([str(inspector), str(column), str(measure)])
+
+    def _new_state(self):
+        '''Returns an empty measure state.'''
+        return {'buffer': deque(maxlen=self.window),
+                'count': 0,
+                'ewma_mean': None,
+                'ewma_var': 0.0,
+                'min': None,
+                'max': None,
+                'last_slice': None}
+
+    def _is_scoreable(self, value):
+        '''Returns True if a measure value is a non-null number.'''
+        if not isinstance(value, Number) or isinstance(value, complex):
+            return False
+        return not isnan(value)
+
+    def get_zscore(self, state, value):
+        '''Returns the absolute EWMA z-score of a value, or None.'''
+        if state['count'] < 2 or state['ewma_var'] <= 0:
+            return None
+        return abs(value - state['ewma_mean']) / sqrt(state['ewma_var'])
+
+    def get_zero_ratio_flag(self, state, value):
+        '''Returns 1 if the value is zero, but all buffered values are non-zero; else 0.'''
+        buffer = state['buffer']
+        if buffer and value == 0 and all(_ != 0 for _ in buffer):
+            return 1
+        return 0
+
+    def get_positive_ratio_flag(self, state, value):
+        '''Returns 1 if the value is non-zero, but all buffered values are zero; else 0.'''
+        buffer = state['buffer']
+        if buffer and value != 0 and all(_ == 0 for _ in buffer):
+            return 1
+        return 0
+
+    def get_range_flag(self, state, value):
+        '''Returns 1 if the value falls outside the running min and max; else 0.'''
+        if state['count'] == 0:
+            return 0
+        if value < state['min'] or value > state['max']:
+            return 1
+        return 0
+
+    def score(self, state, value):
+        '''Scores a value against a measure state.
+
+        Returns:
+            A list of (rule, reference_lags, flag, anomaly_score) tuples.
+        '''
+        lags = len(state['buffer'])
+        zero_flag = self.get_zero_ratio_flag(state, value)
+        positive_flag = self.get_positive_ratio_flag(state, value)
+        range_flag = self.get_range_flag(state, value)
+        scores = [('get_zero_ratio_flag', lags, zero_flag, lags * zero_flag),
+                  ('get_positive_ratio_flag', lags, positive_flag, lags * positive_flag),
+                  ('get_range_flag', state['count'], range_flag, range_flag)]
+        zscore = self.get_zscore(state, value)
+        if zscore is not None:
+            flag = 1 if zscore > self.threshold else 0
+            scores.append(('get_ewma_zscore_flag', state['count'], flag, zscore * flag))
+        return scores
+
+    def update_state(self, state, value):
+        '''Folds a new value into a measure state.'''
+        if state['ewma_mean'] is None:
+            state['ewma_mean'] = float(value)
+        else:
+            diff = value - state['ewma_mean']
+            increment = self.alpha * diff
+            state['ewma_mean'] += increment
+            state['ewma_var'] = (1 - self.alpha) * (state['ewma_var'] + diff * increment)
+        state['min'] = value if state['min'] is None else min(state['min'], value)
+        state['max'] = value if state['max'] is None else max(state['max'], value)
+        state['buffer'].append(value)
+        state['count'] += 1
+
+    def update(self, dataframe):
+        '''Scores a profiled slice and then adds it to the rolling state.
+
+        Args:
+            dataframe (pandas.DataFrame): The profile of a single slice, as
+                returned by data_tsa.Profiler.profile_dataframe. A slice
+                already added to the state is skipped, unless it is None.
+
+        Returns:
+            A pandas.DataFrame of the flagged measures for the slice.
+        '''
+        rows = []
+        for row in dataframe[['inspector', 'column', 'slice', 'measure',
+                              'measure_value']].itertuples(index=False):
+            if not self._is_scoreable(row.measure_value):
+                continue
+            value = float(row.measure_value)
+            key = self._get_key(row.inspector, row.column, row.measure)
+            state = self.state.setdefault(key, self._new_state())
+            # unsliced profiles have no slice to tell runs apart, so every update is scored
+            slice_key = None if row.slice is None else str(row.slice)
+            if slice_key is not None and state['last_slice'] == slice_key:
+                continue
+            for rule, lags, flag, anomaly_score in self.score(state, value):
+                if flag:
+                    rows.append({'inspector': row.inspector,
+                                 'column': row.column,
+                                 'slice': row.slice,
+                                 'measure': row.measure,
+                                 'rule': rule,
+                                 'reference_lags': lags,
+                                 'flag': flag,
+                                 'anomaly_score': anomaly_score})
+            self.update_state(state, value)
+            state['last_slice'] = slice_key
+        self.ad_dataframe = DataFrame(rows, columns=self.ad_dataframe.columns)
+        if self.state_path:
+            self.save(self.state_path)
+        return self.ad_dataframe
+
+    def summary(self):
+        '''Returns a summary dataframe of the last update.'''
+        cols = ['column', 'anomaly_score']
+        df = self.ad_dataframe[cols].groupby('column').sum().reset_index()
+        return df.sort_values('anomaly_score', ascending=0)
+
+    def save(self, path):
+        '''Writes the rolling state to a JSON file.'''
+        state = {}
+        for key, s in self.state.items():
+            state[key] = dict(s)
+            state[key]['buffer'] = list(s['buffer'])
+        with open(path, 'w') as f:
+            dump({'window': self.window, 'alpha': self.alpha, 'state': state}, f)
+
+    def load(self, path):
+        '''Reads the rolling state from a JSON file.'''
+        with open(path) as f:
+            saved = load(f)
+        if saved['window'] != self.window or saved['alpha'] != self.alpha:
+            raise ValueError('The saved state was built with a different window or alpha.')
+        self.state = {}
+        for key, s in saved['state'].items():
+            s['buffer'] = deque(s['buffer'], maxlen=self.window)
+            self.state[key] = s
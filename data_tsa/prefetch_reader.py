@@ -0,0 +1,249 @@
+'''
+This module contains the PrefetchReader class, a pipelined reader that reads
+and decodes chunks of a file, or whole partitions, on background threads
+while the consumer profiles the previous chunks.
+'''
+
+from threading import Condition, Thread
+from time import perf_counter
+from pandas import read_csv
+from data_tsa.dataset_profiler import read_partition
+
+class PrefetchReader:
+
+    def __init__(self, source, chunk_size=100000, max_chunks=4, memory_budget=None,
+                 workers=1, columns=None, reader=read_partition, min_chunk_size=1000):
+        '''Reads DataFrame chunks ahead of their consumer.
+
+        Chunks are buffered in a bounded, ordered queue: readers block once
+        max_chunks chunks, or memory_budget bytes, are waiting to be
+        consumed, so a slow consumer holds back reading instead of letting
+        the buffer grow. Chunks are always yielded in source order.
+
+        Args:
+            source: The path of a CSV or Parquet file, read in chunks of rows
+                by one thread, or a list of partitions (lists of file paths),
+                each read as one chunk by `reader` on `workers` threads.
+            chunk_size (int): The initial number of rows per file chunk.
+            max_chunks (int): The maximum number of buffered chunks.
+            memory_budget (int): Optional maximum number of bytes buffered.
+                File chunk sizes are adapted after every chunk so that the
+                buffer and the chunks being read and consumed fit the budget.
+            workers (int): The number of threads reading partitions.
+            columns (list): Optional list of columns to read.
+            reader (callable): Reads a partition given its files and columns.
+            min_chunk_size (int): The smallest adapted file chunk size.
+        '''
+        if max_chunks < 1:
+            raise ValueError('\'max_chunks\' must be at least 1.')
+        self.source = source
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.memory_budget = memory_budget
+        self.workers = workers if not isinstance(source, str) else 1
+        self.columns = columns
+        self.reader = reader
+        self.min_chunk_size = min_chunk_size
+        self.chunk_sizes = []
+        self._buffer = {}
+        self._buffered_bytes = 0
+        self._next = 0
+        self._count = None
+        self._error = None
+        self._closed = False
+        self._threads = []
+        self._condition = Condition()
+        self._stats = {'chunks': 0,
+                       'rows': 0,
+                       'bytes': 0,
+                       'read_seconds': 0.0,
+                       'reader_wait_seconds': 0.0,
+                       'consumer_wait_seconds': 0.0}
+
+    def start(self):
+        '''Starts the reader threads, if they are not running yet.'''
+        if self._threads:
+            return
+        if isinstance(self.source, str):
+            self._threads = [Thread(target=self._read_file, daemon=True)]
+        else:
+            self._partitions = iter(enumerate(self.source))
+            self._count = len(self.source)
+            self._threads = [Thread(target=self._read_partitions, daemon=True)
+                             for _ in range(max(1, self.workers))]
+        for thread in self._threads:
+            thread.start()
+
+    def close(self):
+        '''Stops the reader threads and drops the buffered chunks.'''
+        with self._condition:
+            self._closed = True
+            self._buffer.clear()
+            self._buffered_bytes = 0
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _wait_for_slot(self, index):
+        '''Blocks a reader until chunk `index` fits in the buffer.
+
+        Returns False when the reader was closed.
+        '''
+        started = perf_counter()
+        with self._condition:
+            while not self._closed and index > self._next and (
+                    index - self._next >= self.max_chunks or
+                    (self.memory_budget and self._buffered_bytes >= self.memory_budget)):
+                self._condition.wait()
+            self._stats['reader_wait_seconds'] += perf_counter() - started
+            return not self._closed
+
+    def _put(self, index, dataframe, seconds):
+        '''Adds a chunk to the buffer and wakes the consumer.'''
+        nbytes = int(dataframe.memory_usage(deep=True).sum())
+        with self._condition:
+            if self._closed:
+                return
+            self._buffer[index] = (dataframe, nbytes)
+            self._buffered_bytes += nbytes
+            self._stats['chunks'] += 1
+            self._stats['rows'] += len(dataframe)
+            self._stats['bytes'] += nbytes
+            self._stats['read_seconds'] += seconds
+            self._condition.notify_all()
+        return nbytes
+
+    def _fail(self, error):
+        '''Hands a reader error to the consumer.'''
+        with self._condition:
+            self._error = error
+            self._condition.notify_all()
+
+    def _adapt_chunk_size(self, rows, nbytes):
+        '''Sizes the next file chunk so that the pipeline fits the memory budget.'''
+        if not self.memory_budget or not rows or not nbytes:
+            return
+        # the buffered chunks, plus the chunks being read and consumed
+        target = self.memory_budget * rows // ((self.max_chunks + 2) * nbytes)
+        self.chunk_size = int(max(self.min_chunk_size, target))
+
+    def _iter_file_chunks(self):
+        '''Yields DataFrame chunks of the source file of the current chunk size.'''
+        if self.source.endswith('.csv'):
+            with read_csv(self.source, usecols=self.columns, iterator=True) as csv:
+                while True:
+                    try:
+                        yield csv.get_chunk(self.chunk_size)
+                    except StopIteration:
+                        return
+        from pyarrow import concat_tables
+        from pyarrow.parquet import ParquetFile
+        parquet = ParquetFile(self.source)
+        table, row_group = None, 0
+        while True:
+            chunk_size = self.chunk_size
+            while (table is None or table.num_rows < chunk_size) and \
+                    row_group < parquet.num_row_groups:
+                group = parquet.read_row_group(row_group, columns=self.columns)
+                table = group if table is None else concat_tables([table, group])
+                row_group += 1
+            if table is None or table.num_rows == 0:
+                return
+            chunk, table = table.slice(0, chunk_size), table.slice(chunk_size)
+            yield chunk.to_pandas()
+
+    def _read_file(self):
+        '''Reads the source file chunk by chunk.'''
+        try:
+            chunks = self._iter_file_chunks()
+            index = 0
+            while self._wait_for_slot(index):
+                started = perf_counter()
+                dataframe = next(chunks, None)
+                if dataframe is None:
+                    break
+                self.chunk_sizes.append(len(dataframe))
+                nbytes = self._put(index, dataframe, perf_counter() - started)
+                self._adapt_chunk_size(len(dataframe), nbytes)
+                index += 1
+            with self._condition:
+                self._count = index
+                self._condition.notify_all()
+        except Exception as e:
+            self._fail(e)
+
+    def _read_partitions(self):
+        '''Reads partitions until none are left.'''
+        try:
+            while True:
+                with self._condition:
+                    index, files = next(self._partitions, (None, None))
+                if index is None or not self._wait_for_slot(index):
+                    return
+                started = perf_counter()
+                dataframe = self.reader(files, self.columns)
+                self._put(index, dataframe, perf_counter() - started)
+        except Exception as e:
+            self._fail(e)
+
+    def _wait_for_chunk(self):
+        '''Blocks the consumer until the next chunk is buffered.
+
+        Returns the chunk, or None when the source is exhausted.
+        '''
+        started = perf_counter()
+        with self._condition:
+            while self._next not in self._buffer and self._error is None and \
+                    not (self._count is not None and self._next >= self._count):
+                self._condition.wait()
+            self._stats['consumer_wait_seconds'] += perf_counter() - started
+            if self._error is not None:
+                raise self._error
+            if self._next not in self._buffer:
+                return None
+            return self._buffer[self._next][0]
+
+    def peek(self):
+        '''Returns the next chunk without consuming it, or None.'''
+        self.start()
+        return self._wait_for_chunk()
+
+    def __iter__(self):
+        self.start()
+        while True:
+            dataframe = self._wait_for_chunk()
+            if dataframe is None:
+                return
+            with self._condition:
+                self._buffered_bytes -= self._buffer.pop(self._next)[1]
+                self._next += 1
+                self._condition.notify_all()
+            yield dataframe
+
+    def stats(self):
+        '''Returns the throughput and wait times of the pipeline stages.
+
+        Readers waiting on a full buffer means the consumer is the
+        bottleneck; the consumer waiting on an empty buffer means reading
+        is.
+
+        Returns:
+            Dictionary with the number of 'chunks', 'rows' and 'bytes' read,
+            the seconds spent reading and decoding ('read_seconds'), the
+            seconds readers were blocked by backpressure
+            ('reader_wait_seconds'), the seconds the consumer waited for
+            data ('consumer_wait_seconds'), the 'chunk_size' of the next
+            file chunk, and 'bound', which is 'io' or 'cpu'.
+        '''
+        with self._condition:
+            stats = dict(self._stats)
+        stats['chunk_size'] = self.chunk_size
+        stats['bound'] = 'io' if stats['consumer_wait_seconds'] > stats['reader_wait_seconds'] else 'cpu'
+        return stats
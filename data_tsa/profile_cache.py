@@ -0,0 +1,80 @@
+'''
+This module contains the ProfileCache class, a bounded LRU cache that maps
+content fingerprints of profiled columns to their inspection measures.
+'''
+
+from collections import OrderedDict
+from hashlib import md5
+from os.path import exists
+from pickle import dump, load
+from threading import Lock
+from pandas.util import hash_pandas_object
+
+class ProfileCache:
+
+    def __init__(self, path=None, max_size=100000):
+        '''Caches inspection measures by column content fingerprint.
+
+        Args:
+            path (str): Optional pickle file used to persist the cache. When
+                the file exists the cache is loaded from it.
+            max_size (int): The maximum number of cached entries. The least
+                recently used entries are evicted first.
+
+        The cache is safe to share between threads.
+        '''
+        self.path = path
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        if path and exists(path):
+            self.load(path)
+
+    def get_fingerprint(self, series, *context):
+        '''Returns a fingerprint of a series' values and dtype, or None.
+
+        The values are hashed with one vectorized pass and the row hashes
+        are digested in order. Extra context, such as the inspector type,
+        is part of the fingerprint.
+        '''
+        try:
+            hashes = hash_pandas_object(series, index=False).values
+        except TypeError:
+            return None
+        m = md5(hashes.tobytes())
+        m.update(repr((str(series.dtype), len(series)) + context).encode('utf-8'))
+        return m.hexdigest()
+
+    def get(self, key):
+        '''Returns the cached measures for a fingerprint, or None.'''
+        with self._lock:
+            if key is None or key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+    def put(self, key, measures):
+        '''Caches the measures for a fingerprint, evicting the least recently used.'''
+        if key is None:
+            return
+        with self._lock:
+            self.entries[key] = measures
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def save(self, path=None):
+        '''Writes the cache to a pickle file.'''
+        with self._lock, open(path or self.path, 'wb') as f:
+            dump((self.max_size, self.entries), f)
+
+    def load(self, path):
+        '''Reads the cache from a pickle file.'''
+        with open(path, 'rb') as f:
+            _, self.entries = load(f)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
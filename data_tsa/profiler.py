@@ -1,16 +1,24 @@
 # -*- coding: utf-8 -*-
 
 import numpy as np
-from pandas import DataFrame
+from pandas import DataFrame, Series, Timestamp, concat
 from data_tsa.inspector import Inspector
+from data_tsa.correlation_inspector import CorrelationInspector
 from data_tsa.boolean_inspector import BooleanInspector
 from data_tsa.number_inspector import NumberInspector, number_dtypes
 from data_tsa.string_inspector import StringInspector
 from data_tsa.date_inspector import DateInspector
+from data_tsa.result_index import ResultIndex
+
+bucket_widths = {'hour': 3600 * 10 ** 9,
+                 'day': 86400 * 10 ** 9,
+                 'week': 7 * 86400 * 10 ** 9}
 
 class Profiler:
 
-    def __init__(self, dataframe, slicer=None):
+    def __init__(self, dataframe, slicer=None, histogram_bins=None,
+                 histogram_method='fixed', cache=None, frequency=None,
+                 correlation=False):
         '''Profiles the columns of a pandas.DataFrame.
 
         Args:
@@ -18,15 +26,74 @@ class Profiler:
             slicer (str): Indicates a column containing logical ordered
                 partition. When specified, the profiler will profile
                 each partition in order and return the concatenated result
-                set.
+                set. A list of columns, e.g. ['day', 'region'], slices by
+                every combination of values in one grouped pass; slices are
+                then tuples ordered by the first column, and lags and drift
+                compare each slice with the prior slices of the same
+                remaining values.
+            histogram_bins (int): Optional number of histogram bins. When
+                specified, number columns get a 'histogram_sketch' measure
+                and sliced profiles get 'psi', 'ks_statistic' and
+                'js_divergence' drift measures.
+            histogram_method (str): 'fixed' for equal-width bins or 'quantile'
+                for equal-frequency bins, both computed over the whole column.
+            cache (data_tsa.ProfileCache): Optional cache of measures keyed by
+                column content fingerprints. Slices and columns whose content
+                is unchanged are served from the cache instead of inspected.
+            frequency (str): Optional 'hour', 'day', 'week' or 'month'. When
+                specified, the slicer must be a single datetime column whose
+                values are bucketed by that frequency; slices are the bucket
+                start timestamps, weeks start on Monday, and empty buckets
+                are reported as gap slices with a row_count of 0 and null
+                measures so that lags stay aligned.
+            correlation (bool): When True, every pair of number columns gets
+                'correlation' and 'null_cooccurrence_ratio' measures from a
+                'correlation' inspector, with 'a:b' as the column.
         '''
         self.dataframe = dataframe
-        if slicer:
-            self.validate_column(slicer)
         self.slicer = slicer
+        for column in self.get_slicer_columns():
+            self.validate_column(column)
+        if histogram_method not in ('fixed', 'quantile'):
+            raise ValueError('\'histogram_method\' must be \'fixed\' or \'quantile\'')
+        if frequency:
+            if frequency not in ('hour', 'day', 'week', 'month'):
+                raise ValueError('\'frequency\' must be \'hour\', \'day\', \'week\', or \'month\'')
+            if (len(self.get_slicer_columns()) != 1 or
+                dataframe[slicer].dtype.type != np.datetime64):
+                raise ValueError('\'frequency\' requires a single datetime slicer column')
+        self._init_attributes(slicer, histogram_bins, histogram_method, cache,
+                              frequency, correlation)
+
+    def _init_attributes(self, slicer=None, histogram_bins=None, histogram_method='fixed',
+                         cache=None, frequency=None, correlation=False):
+        '''Sets the profiling options and state shared by every profiler backend.'''
+        self.slicer = slicer
+        self.frequency = frequency
+        self.correlation = correlation
+        self.histogram_bins = histogram_bins
+        self.histogram_method = histogram_method
+        self.bin_edges = {}
+        self.cache = cache
         self.type_exceptions = []
         self.result = DataFrame()
 
+    @property
+    def result(self):
+        '''The profile result; assigning it invalidates the result index.'''
+        return self._result
+
+    @result.setter
+    def result(self, value):
+        self._result = value
+        self._result_index = None
+
+    def get_result_index(self):
+        '''Returns a data_tsa.ResultIndex over self.result, built on first use.'''
+        if self._result_index is None:
+            self._result_index = ResultIndex(self._result)
+        return self._result_index
+
     def set_type_exception(self, column, dtype):
         '''Specify custom target inspection types
 
@@ -101,12 +168,78 @@ class Profiler:
             '''
             return ValueError(msg)
 
+    def get_slicer_columns(self):
+        '''Returns the slicer as a list of column names.'''
+        if not self.slicer:
+            return []
+        if isinstance(self.slicer, str):
+            return [self.slicer]
+        return list(self.slicer)
+
+    def _get_group_keys(self):
+        '''Returns the groupby keys of the slicer; one column yields scalar slices.'''
+        if self.frequency:
+            return self.get_time_buckets()
+        columns = self.get_slicer_columns()
+        return columns[0] if len(columns) == 1 else columns
+
+    def get_time_buckets(self):
+        '''Returns the bucket start of every row of the datetime slicer.
+
+        Buckets are computed with integer arithmetic on the int64 timestamps
+        (calendar months with numpy's datetime64[M]), without adding a key
+        column to the dataframe.
+
+        Returns:
+            numpy.ndarray of datetime64[ns] values; NaT rows stay NaT.
+        '''
+        values = self.dataframe[self.slicer].values
+        if self.frequency == 'month':
+            return values.astype('datetime64[M]').astype('datetime64[ns]')
+        width = bucket_widths[self.frequency]
+        # 1970-01-01 is a Thursday; shift by three days so weeks start on Monday
+        offset = 3 * bucket_widths['day'] if self.frequency == 'week' else 0
+        ticks = values.view('int64')
+        buckets = ((ticks + offset) // width * width - offset).view('datetime64[ns]')
+        return np.where(np.isnat(values), np.datetime64('NaT'), buckets)
+
     def get_slicer_values(self):
-        '''Returns a sorted list of unique slicer values.'''
+        '''Returns a sorted list of unique slicer values.
+
+        Values are tuples when the slicer has more than one column. With a
+        frequency, values are every bucket between the first and last one,
+        including empty buckets.
+        '''
+        if self.frequency:
+            buckets = self.get_time_buckets()
+            buckets = buckets[~np.isnat(buckets)]
+            if len(buckets) == 0:
+                return []
+            if self.frequency == 'month':
+                months = buckets.astype('datetime64[M]')
+                buckets = np.arange(months.min(), months.max() + 1).astype('datetime64[ns]')
+            else:
+                width = np.timedelta64(bucket_widths[self.frequency], 'ns')
+                buckets = np.arange(buckets.min(), buckets.max() + width, width)
+            return [Timestamp(_) for _ in buckets]
+        if len(self.get_slicer_columns()) > 1:
+            return list(self.dataframe.groupby(self._get_group_keys()).groups)
         s = self.dataframe[self.slicer].unique().tolist()
         s.sort()
         return s
 
+    def _get_series_keys(self, dataframe, keys):
+        '''Returns the groupby keys identifying each measure series.
+
+        Tuple slices from a multi-column slicer are ordered by their first
+        value; the remaining values identify separate series.
+        '''
+        slices = dataframe['slice']
+        if len(slices) and isinstance(slices.iloc[0], tuple):
+            return [dataframe[_].values for _ in keys] + \
+                   [slices.map(lambda _: _[1:]).values]
+        return keys
+
     def insp_dict_to_dataframe(self, column, inspection_dict):
         '''Tranforms and inspection dictionary into a pandas.DataFrame.'''
         d = {k: [v] for k, v in inspection_dict.items()}
@@ -125,19 +258,35 @@ class Profiler:
         Returns:
             dataframe: A dataframe containing summary measures for each column.
         '''
-        if self.slicer:
-            slices = self.get_slicer_values()
-        else:
+        if self.histogram_bins:
+            self.bin_edges = {col: self.get_bin_edges(col)
+                              for col in self.dataframe.columns
+                              if self.get_column_dtype(col) == 'number'}
+
+        if not self.slicer:
             self.result = self.profile_dataframe(self.dataframe, None)
+            if self.cache is not None and self.cache.path:
+                self.cache.save()
             return self.result
 
         result = DataFrame()
 
-        for s in slices:
-            print(slices.index(s) + 1, '/', len(slices))
-            df = self.dataframe[self.dataframe[self.slicer]==s]
+        groups = self.dataframe.groupby(self._get_group_keys(), sort=True)
+        for i, (s, df) in enumerate(groups):
+            print(i + 1, '/', groups.ngroups)
             result = result.append(self.profile_dataframe(df, s))
 
+        if self.frequency:
+            result = concat([result, self.get_gap_measures(result)], sort=False)
+
+        return self._finish_profile(result, lags)
+
+    def _finish_profile(self, result, lags):
+        '''Adds drift measures and lags to the profiled slices and stores the result.'''
+        if self.histogram_bins:
+            result = concat([result, self.get_drift_measures(result, lags)],
+                            sort=False)
+
         result = result.sort_values(['inspector',
                                      'column',
                                      'measure',
@@ -146,10 +295,107 @@ class Profiler:
         if lags:
             result = self.get_lags(result, lags)
 
+        if self.cache is not None and self.cache.path:
+            self.cache.save()
+
         self.result = result
         
         return result
 
+    def profile_stream(self, chunks, lags=3):
+        '''Profiles an iterable of DataFrame chunks ordered by the slicer.
+
+        Chunks usually come from a data_tsa.PrefetchReader, so that reading
+        the next chunk overlaps with profiling the current one. Rows of a
+        slice may span several chunks; a slice is profiled as soon as a
+        chunk starts with a later slice, so only one slice is buffered.
+        Column types and histogram bin edges are resolved from
+        self.dataframe, e.g. the first chunk from PrefetchReader.peek();
+        set type exceptions for columns the sample does not represent.
+
+        Args:
+            chunks (iterable): pandas.DataFrame chunks sorted by the slicer.
+                Closed when profiling ends or fails, if it has a close()
+                method.
+            lags (int): The number of lagging measure values to be added to
+                the output table
+
+        Returns:
+            dataframe: A dataframe containing summary measures for each column.
+        '''
+        try:
+            result = [df for _, df in self.iter_profile_stream(chunks)]
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        if not result:
+            raise ValueError('No rows to profile.')
+
+        return self._finish_profile(concat(result), lags)
+
+    def iter_profile_stream(self, chunks):
+        '''Profiles slice-ordered chunks, yielding each slice once it is complete.
+
+        Args:
+            chunks (iterable): pandas.DataFrame chunks sorted by the slicer.
+
+        Yields:
+            (slice_value, dataframe) tuples of the measures of each slice,
+            without lags.
+        '''
+        if len(self.get_slicer_columns()) != 1 or self.frequency:
+            raise ValueError('profile_stream() requires a single slicer column without a frequency.')
+        if self.histogram_bins:
+            self.bin_edges = {col: self.get_bin_edges(col)
+                              for col in self.dataframe.columns
+                              if self.get_column_dtype(col) == 'number'}
+
+        current, parts = None, []
+        for chunk in chunks:
+            for s, df in chunk.groupby(self.slicer, sort=True):
+                if parts and s == current:
+                    parts.append(df)
+                    continue
+                if parts and not s > current:
+                    raise ValueError('Chunks must be sorted by \'{}\'; \'{}\' follows \'{}\'.'
+                                     .format(self.slicer, s, current))
+                if parts:
+                    yield current, self.profile_dataframe(concat(parts), current)
+                current, parts = s, [df]
+        if parts:
+            yield current, self.profile_dataframe(concat(parts), current)
+
+    def get_gap_measures(self, dataframe):
+        '''Returns measures for the empty buckets of a time-bucketed profile.
+
+        Every measure series gets a row for each missing bucket: row_count
+        is 0, histogram sketches are empty and the other measures are null.
+
+        Args:
+            dataframe (pandas.DataFrame): A profile of the non-empty buckets.
+
+        Returns:
+            A pandas.DataFrame in the profile format.
+        '''
+        output_columns = ['inspector', 'column', 'slice', 'measure', 'measure_value']
+        missing = sorted(set(self.get_slicer_values()) - set(dataframe['slice']))
+        if not missing:
+            return DataFrame(columns=output_columns)
+        series = dataframe[['inspector', 'column', 'measure']].drop_duplicates()
+        series = series.reset_index(drop=True)
+        gaps = series.loc[series.index.repeat(len(missing))].reset_index(drop=True)
+        gaps['slice'] = missing * len(series)
+        values = []
+        for column, measure in zip(gaps['column'], gaps['measure']):
+            if measure == 'row_count':
+                values.append(0)
+            elif measure == 'histogram_sketch':
+                values.append([0] * (len(self.bin_edges[column]) - 1))
+            else:
+                values.append(None)
+        gaps['measure_value'] = Series(values, dtype=object)
+        return gaps[output_columns]
+
     def profile_dataframe(self, dataframe, slice_value):
         '''Profiles an individual DataFrame, usually a sliced partition.
 
@@ -175,7 +421,7 @@ class Profiler:
                 insp = StringInspector(dataframe[col])
                 inspector_type = 'string'
             elif dtype == 'number':
-                insp = NumberInspector(dataframe[col])
+                insp = NumberInspector(dataframe[col], self.bin_edges.get(col))
                 inspector_type = 'number'
             elif dtype == 'datetime':
                 insp = DateInspector(dataframe[col])
@@ -183,25 +429,136 @@ class Profiler:
             else:
                 insp = Inspector(dataframe[col])
                 inspector_type = 'generic'
-            insp_dict = insp.inspect()
+            insp_dict = None
+            if self.cache is not None:
+                edges = self.bin_edges.get(col)
+                key = self.cache.get_fingerprint(dataframe[col], inspector_type,
+                                                 None if edges is None else tuple(edges))
+                insp_dict = self.cache.get(key)
+            if insp_dict is None:
+                insp_dict = insp.inspect()
+                if self.cache is not None:
+                    self.cache.put(key, insp_dict)
             df = self.insp_dict_to_dataframe(col, insp_dict)
             df['inspector'] = inspector_type
-            df['slice'] = slice_value
+            df['slice'] = [slice_value] * len(df)
             result = result.append(df[output_columns])
 
+        if self.correlation:
+            result = result.append(self.get_correlation_measures(dataframe, slice_value))
+
         return result
 
-    def get_lag_measure(self, row):
-        '''Returns the lagged value of a measure'''
-        if (row['column'] == row['_column'] and
-            row['measure'] == row['_measure']):
-            return row['_measure_value']
+    def get_correlation_measures(self, dataframe, slice_value):
+        '''Profiles the relationships between the number columns of a DataFrame.
+
+        Args:
+            dataframe (pandas.DataFrame): A pandas.DataFrame
+            slice_value (str): The slicer value for a given partition.
+
+        Returns:
+            A pandas.DataFrame with a row per pair of number columns and
+            measure, in the profile format. Slicer columns are constant
+            within a slice, so they are not paired.
+        '''
+        output_columns = ['inspector', 'column', 'slice', 'measure', 'measure_value']
+        slicer_columns = self.get_slicer_columns()
+        columns = [col for col in dataframe.columns
+                   if col not in slicer_columns and self.get_column_dtype(col) == 'number']
+        if len(columns) < 2:
+            return DataFrame(columns=output_columns)
+        insp = CorrelationInspector(dataframe[columns])
+        rows = [(pair, measure, value)
+                for pair, insp_dict in insp.inspect().items()
+                for measure, value in insp_dict.items()]
+        df = DataFrame(rows, columns=['column', 'measure', 'measure_value'], dtype=object)
+        df['inspector'] = 'correlation'
+        df['slice'] = [slice_value] * len(df)
+        return df[output_columns]
+
+    def get_bin_edges(self, column):
+        '''Returns histogram bin edges for a number column.
+
+        The inner edges are derived from the whole column, so that sketches
+        of different slices are comparable. The outer edges are -inf and inf,
+        so every non-null value falls in a bin.
+
+        Args:
+            column (str): column name
+
+        Returns:
+            numpy.ndarray of self.histogram_bins + 1 edges, or fewer when
+            quantile edges coincide.
+        '''
+        values = self.dataframe[column].values.astype(float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return np.array([-np.inf, np.inf])
+        if self.histogram_method == 'quantile':
+            quantiles = np.linspace(0, 1, self.histogram_bins + 1)
+            edges = np.unique(np.percentile(values, quantiles * 100))
         else:
-            return None
+            edges = np.linspace(values.min(), values.max(), self.histogram_bins + 1)
+        return np.concatenate([[-np.inf], edges[1:-1], [np.inf]])
+
+    def get_drift_measures(self, dataframe, lags=1):
+        '''Returns drift measures derived from the histogram sketches.
+
+        Each slice's sketch is compared with the pooled sketches of up to
+        `lags` preceding slices. The first slice has no reference and gets
+        null values.
+
+        Args:
+            dataframe (pandas.DataFrame): A profile containing
+                'histogram_sketch' measures.
+            lags (int): The number of preceding slices in the reference.
+
+        Returns:
+            A pandas.DataFrame with 'psi', 'ks_statistic' and
+            'js_divergence' measures in the profile format.
+        '''
+        epsilon = 1e-4
+        lags = max(lags or 1, 1)
+        sketches = dataframe[dataframe['measure']=='histogram_sketch']
+        result = []
+        keys = self._get_series_keys(sketches, ['inspector', 'column'])
+        for key, df in sketches.groupby(keys):
+            inspector, column = key[:2]
+            df = df.sort_values('slice')
+            counts = np.array(df['measure_value'].tolist(), dtype=float)
+            cumulative = np.vstack([np.zeros((1, counts.shape[1])),
+                                    np.cumsum(counts, axis=0)])
+            positions = np.arange(len(counts))
+            reference = cumulative[positions] - cumulative[np.maximum(positions - lags, 0)]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                p = counts / counts.sum(axis=1, keepdims=True)
+                q = reference / reference.sum(axis=1, keepdims=True)
+            p_s = (p + epsilon) / (1 + epsilon * p.shape[1])
+            q_s = (q + epsilon) / (1 + epsilon * q.shape[1])
+            m = (p_s + q_s) / 2
+            drift = {'psi': ((p_s - q_s) * np.log(p_s / q_s)).sum(axis=1),
+                     'ks_statistic': np.abs(np.cumsum(p, axis=1) -
+                                            np.cumsum(q, axis=1)).max(axis=1),
+                     'js_divergence': ((p_s * np.log2(p_s / m)).sum(axis=1) +
+                                       (q_s * np.log2(q_s / m)).sum(axis=1)) / 2}
+            for measure, values in drift.items():
+                values = [None if np.isnan(_) else float(_) for _ in values]
+                result.append(DataFrame({'inspector': inspector,
+                                         'column': column,
+                                         'slice': df['slice'].values,
+                                         'measure': measure,
+                                         'measure_value': values}))
+        output_columns = ['inspector', 'column', 'slice', 'measure', 'measure_value']
+        if not result:
+            return DataFrame(columns=output_columns)
+        return concat(result)[output_columns]
 
     def get_lags(self, dataframe, lags=1):
         '''Returns the specified number of lagged measure values
         
+        The dataframe is expected to be sorted by slice within each
+        (inspector, column, measure) series, as returned by profile().
+        
         Args:
             dataframe (pandas.DataFrame): A pandas.DataFrame object
             lags (int): The number of lagged measure values to be calculated
@@ -209,22 +566,121 @@ class Profiler:
         Returns:
             A pandas.DataFrame object with new lagging measure value columns
         '''
+        keys = self._get_series_keys(dataframe, ['inspector', 'column', 'measure'])
+        groups = dataframe.groupby(keys, sort=False)['measure_value']
+        position = groups.cumcount().values
         for i in range(1, lags+1):
-            dataframe['_column'] = dataframe['column'].shift(i)
-            dataframe['_measure'] = dataframe['measure'].shift(i)
-            dataframe['_measure_value'] = dataframe['measure_value'].shift(i)
             column = 'l{}_measure_value'.format(i)
-            dataframe[column] = dataframe.apply(self.get_lag_measure, 1)
-            dataframe = dataframe.drop(['_column',
-                                        '_measure',
-                                        '_measure_value'], 1)
+            lagged = groups.shift(i).astype(object).values
+            lagged[position < i] = None
+            dataframe[column] = lagged
         return dataframe
     
+    def rollup(self, level=1, lags=3):
+        '''Derives a coarser profile from a multi-column slicer profile.
+
+        Coarse measures are merged from the fine-grained profile instead of
+        re-inspecting rows: counts are summed, ratios are weighted by row
+        count, means by non-null count, standard deviations are pooled from
+        each slice's count, mean and standard deviation, min/max values and
+        indicators take the extreme and histogram sketches are added.
+        Measures that can't be merged, such as distinct counts, medians and
+        value counts, are omitted.
+
+        Args:
+            level (int): The number of leading slicer columns to keep, e.g.
+                1 rolls a ['day', 'region'] profile up to days.
+            lags (int): The number of lagging measure values to be added to
+                the output table
+
+        Returns:
+            dataframe: A dataframe containing summary measures for each column.
+        '''
+        columns = self.get_slicer_columns()
+        if len(columns) < 2:
+            raise ValueError('rollup() requires a multi-column slicer.')
+        if not 1 <= level < len(columns):
+            raise ValueError('\'level\' must be between 1 and {}'.format(len(columns) - 1))
+        if self.result.empty:
+            raise ValueError('The profile result has not been calculated!')
+
+        ratios = ['null_ratio', 'negative_ratio', 'zero_ratio', 'true_ratio',
+                  'false_ratio', 'empty_ratio', 'special_character_ratio',
+                  'trim_required_ratio']
+        extremes = {'min_value': 'min', 'max_value': 'max',
+                    'redundancy_indicator': 'max', 'conversion_error_indicator': 'max'}
+
+        profile = self.result[['inspector', 'column', 'slice', 'measure', 'measure_value']]
+        wide = profile.set_index(['inspector', 'column', 'slice', 'measure'])
+        wide = wide['measure_value'].unstack('measure').reset_index()
+        wide['slice'] = wide['slice'].map(lambda _: _[0] if level == 1 else _[:level])
+        keys = ['inspector', 'column', 'slice']
+
+        rows = wide['row_count'].astype(float)
+        parts = DataFrame({'row_count': rows})
+        for measure in ratios:
+            if measure in wide.columns:
+                parts[measure] = wide[measure].astype(float) * rows
+        if 'mean_value' in wide.columns:
+            mean = wide['mean_value'].astype(float)
+            stdev = wide['stdev'].astype(float).fillna(0)
+            count = (rows * (1 - wide['null_ratio'].astype(float))).round()
+            count = count.where(mean.notnull(), 0)
+            parts['value_count'] = count
+            parts['value_sum'] = (count * mean).fillna(0)
+            parts['value_square_sum'] = ((count - 1).clip(lower=0) * stdev ** 2 +
+                                         count * mean ** 2).fillna(0)
+        parts = concat([wide[keys], parts], axis=1)
+        merged = parts.groupby(keys, sort=False).sum()
+        rows = merged.pop('row_count')
+        for measure in ratios:
+            if measure in merged.columns:
+                merged[measure] = merged[measure] / rows
+        merged['row_count'] = rows.astype(int)
+        if 'mean_value' in wide.columns:
+            n = merged.pop('value_count')
+            total = merged.pop('value_sum')
+            square_total = merged.pop('value_square_sum')
+            with np.errstate(divide='ignore', invalid='ignore'):
+                merged['mean_value'] = total / n
+                variance = (square_total - n * merged['mean_value'] ** 2) / (n - 1)
+            merged['stdev'] = np.sqrt(variance.clip(lower=0)).where(n > 1)
+
+        groups = wide.groupby(keys, sort=False)
+        for measure, how in extremes.items():
+            if measure in wide.columns:
+                merged[measure] = groups[measure].agg(
+                    lambda _: getattr(_.dropna(), how)() if _.notnull().any() else None)
+        if 'histogram_sketch' in wide.columns:
+            merged['histogram_sketch'] = groups['histogram_sketch'].agg(
+                lambda _: np.sum(_.dropna().tolist(), axis=0).tolist()
+                          if _.notnull().any() else None)
+
+        result = merged.astype(object).where(merged.notnull(), None)
+        result = result.stack(dropna=False).rename('measure_value').reset_index()
+        result = result.rename(columns={'level_3': 'measure'})
+        measures = profile[['inspector', 'column', 'measure']].drop_duplicates()
+        result = result.merge(measures, on=['inspector', 'column', 'measure'])
+
+        if self.histogram_bins:
+            result = concat([result, self.get_drift_measures(result, lags)],
+                            sort=False)
+
+        result = result[['inspector', 'column', 'slice', 'measure', 'measure_value']]
+        result = result.sort_values(['inspector',
+                                     'column',
+                                     'measure',
+                                     'slice'])
+
+        if lags:
+            result = self.get_lags(result, lags)
+
+        return result
+
     def show_column_result(self, column):
         '''Returns a pivot of the measure values by slice for a given column'''
         self.validate_column(column)
         if self.result.empty:
             raise ValueError('The profile result has not been calculated!')
             return False
-        df = self.result[self.result['column']==column][['slice', 'measure', 'measure_value']]
-        return df.pivot(index='slice', columns='measure').reset_index()
+        return self.get_result_index().pivot(column)
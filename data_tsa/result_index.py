@@ -0,0 +1,60 @@
+'''
+This module contains the ResultIndex class, a lookup structure over the
+long-format result DataFrames produced by Profiler and AnomalyDetector.
+'''
+
+class ResultIndex:
+
+    def __init__(self, dataframe):
+        '''Serves repeated equality lookups on a result DataFrame.
+
+        Hash indexes mapping key values to row positions are built lazily,
+        once per combination of key columns, so every later lookup on the
+        same columns is a dictionary access instead of a boolean-mask scan.
+        Wide per-column pivots are cached the same way. A ResultIndex is
+        only valid for the DataFrame it was built on; owners rebuild it when
+        they assign a new result.
+
+        Args:
+            dataframe (pandas.DataFrame): A long-format result DataFrame.
+        '''
+        self.dataframe = dataframe
+        self._indices = {}
+        self._pivots = {}
+
+    def get_positions(self, keys):
+        '''Returns a dictionary mapping key values to row positions.
+
+        Args:
+            keys (tuple): The key column names. Single-column keys map
+                scalar values, multi-column keys map tuples of values.
+        '''
+        if keys not in self._indices:
+            if self.dataframe.empty:
+                self._indices[keys] = {}
+            else:
+                by = keys[0] if len(keys) == 1 else list(keys)
+                self._indices[keys] = self.dataframe.groupby(by, sort=False).indices
+        return self._indices[keys]
+
+    def lookup(self, **criteria):
+        '''Returns the rows whose columns equal the given values.
+
+        Example:
+            index.lookup(inspector='number', measure='max_value')
+        '''
+        keys = tuple(sorted(criteria))
+        value = tuple(criteria[_] for _ in keys)
+        if len(keys) == 1:
+            value = value[0]
+        positions = self.get_positions(keys).get(value)
+        if positions is None:
+            return self.dataframe.iloc[0:0]
+        return self.dataframe.iloc[positions]
+
+    def pivot(self, column):
+        '''Returns a pivot of the measure values by slice for a given column.'''
+        if column not in self._pivots:
+            df = self.lookup(column=column)[['slice', 'measure', 'measure_value']]
+            self._pivots[column] = df.pivot(index='slice', columns='measure').reset_index()
+        return self._pivots[column].copy()
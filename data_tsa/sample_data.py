@@ -1,74 +1,185 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 
 class SampleData:
 
-    def __init__(self, n):
+    def __init__(self, n, seed=None, slices=None, cardinality=None,
+                 null_rate=0.5, width=0, anomalies=(),
+                 created_at_step=None):
         '''Generates a sample pandas.DataFrame.
 
         Args:
             n (int): The desired length of the example DataFrame.
+            seed (int): Optional random seed. Output is reproducible for a
+                given seed (and chunk size, when streaming with iter_chunks).
+            slices (int): Optional number of ordered slices. When specified,
+                a 'slice' column numbers contiguous, equally sized blocks of
+                rows from 0 to slices - 1.
+            cardinality (int): Optional number of distinct 'string_slicer'
+                values. The default domain is 'A', 'B', 'C' and 'D'.
+            null_rate (float): The probability of a null 'partial_null' value.
+            width (int): The number of extra 'number_<i>' float columns.
+            anomalies (list): A list of (slice, column, kind) tuples injected
+                into generated data; see inject_anomaly for the kinds.
+            created_at_step (numpy.timedelta64): The interval between
+                consecutive 'created_at' values. The default value is 6
+                hours, shortened for large n so that all values stay within
+                the pandas timestamp range.
 
         Returns:
             pandas.DataFrame
         '''
         if n < 30:
             print('WARNING: n values under 30 may result in incomplete test sets.')
+        if anomalies and not slices:
+            raise ValueError('\'anomalies\' require \'slices\' to be specified.')
         self.n = n
+        self.seed = seed
+        self.slices = slices
+        self.cardinality = cardinality
+        self.null_rate = null_rate
+        self.width = width
+        self.anomalies = list(anomalies)
+        if created_at_step is None:
+            span = pd.Timestamp.max - pd.Timestamp(2018, 1, 1)
+            created_at_step = min(np.timedelta64(6, 'h'), (span // max(n, 1)).to_timedelta64())
+        self.created_at_step = created_at_step
+        self.random_state = np.random.RandomState(seed)
         self.df = pd.DataFrame()
+        self._constants = {}
 
-    def _generate_list_from_domain(self, domain):
-        return [np.random.choice(domain) for _ in range(self.n)]
+    def _generate_list_from_domain(self, domain, size=None):
+        '''Returns `size` values drawn uniformly from domain in one vectorized call.'''
+        values = np.asarray(domain)
+        if values.dtype.kind == 'U':
+            values = values.astype(object)
+        return values[self.random_state.randint(0, len(values), size or self.n)]
 
-    def _get_id(self, name):
-        self.df[name] = np.arange(self.n).tolist()
+    def _get_id(self, name, offset, size):
+        self.df[name] = np.arange(offset, offset + size)
 
-    def _get_partial_null(self, name):
-        d = [np.NaN, 0]
-        self.df[name] = self._generate_list_from_domain(d)
+    def _get_partial_null(self, name, offset, size):
+        nulls = self.random_state.random_sample(size) < self.null_rate
+        self.df[name] = np.where(nulls, np.NaN, 0)
 
-    def _get_created_at(self, name):
-        base = datetime(2018, 1, 1)
-        arr = [base + timedelta(hours=i*6) for i in range(self.n)]
-        self.df[name] = arr
+    def _get_created_at(self, name, offset, size):
+        base = np.datetime64(datetime(2018, 1, 1))
+        self.df[name] = base + np.arange(offset, offset + size) * self.created_at_step
 
-    def _get_string_slicer(self, name):
+    def _get_string_slicer(self, name, offset, size):
         d = ['A', 'B', 'C', 'D']
-        self.df[name] = self._generate_list_from_domain(d)
+        if self.cardinality:
+            d = ['S{}'.format(i) for i in range(self.cardinality)]
+        self.df[name] = self._generate_list_from_domain(d, size)
 
-    def _get_duplicate_string(self, name):
+    def _get_duplicate_string(self, name, offset, size):
         d = ['Test', 'test', 'testing', 'Testing', 'test    ']
-        self.df[name] = self._generate_list_from_domain(d)
+        self.df[name] = self._generate_list_from_domain(d, size)
 
-    def _get_mixed_precision_datetime(self, name):
+    def _get_mixed_precision_datetime(self, name, offset, size):
         d = [datetime(2019, 1, 1),
              datetime(2019, 1, 1, 1),
              datetime(2019, 1, 1, 1, 1),
              datetime(2019, 1, 1, 1, 1, 1)]
-        self.df[name] = self._generate_list_from_domain(d)
+        self.df[name] = self._generate_list_from_domain(d, size)
 
-    def _get_date_string(self, name):
+    def _get_date_string(self, name, offset, size):
         d = ['1/1/2019',
              '1/1/2019 12:00',
              '1/1/2019 12:00:00']
-        self.df[name] = self._generate_list_from_domain(d)
+        self.df[name] = self._generate_list_from_domain(d, size)
 
-    def _get_mixed_sign_numbers(self, name):
+    def _get_mixed_sign_numbers(self, name, offset, size):
         d = [-1, 1]
-        self.df[name] = self._generate_list_from_domain(d)
+        self.df[name] = self._generate_list_from_domain(d, size)
+
+    def _get_numbers(self, name, offset, size):
+        self.df[name] = self.random_state.normal(100, 10, size)
+
+    def _get_slice(self, name, offset, size):
+        self.df[name] = np.arange(offset, offset + size) * self.slices // self.n
+
+    def inject_anomaly(self, dataframe, slice_value, column, kind):
+        '''Injects a known anomaly into one slice of a generated DataFrame.
+
+        Args:
+            dataframe (pandas.DataFrame): A DataFrame with a 'slice' column.
+            slice_value (int): The slice to modify.
+            column (str): The column to modify.
+            kind (str): 'null' sets the values to NaN, 'zero' sets them to 0,
+                'scale' multiplies numeric values by 10 and 'constant'
+                repeats one value, drawn once per slice.
+
+        Returns:
+            The modified pandas.DataFrame.
+        '''
+        rows = dataframe['slice'] == slice_value
+        if not rows.any():
+            return dataframe
+        if kind == 'null':
+            dataframe.loc[rows, column] = np.NaN
+        elif kind == 'zero':
+            dataframe.loc[rows, column] = 0
+        elif kind == 'scale':
+            dataframe.loc[rows, column] = dataframe.loc[rows, column] * 10
+        elif kind == 'constant':
+            dataframe.loc[rows, column] = self._get_constant(slice_value, column)
+        else:
+            raise ValueError('\'kind\' must be \'null\', \'zero\', \'scale\', or \'constant\'')
+        return dataframe
+
+    def _get_constant(self, slice_value, column):
+        '''Returns the 'constant' anomaly value of a slice and column.
+
+        The value is generated for the first row of the slice from a random
+        state keyed by the seed and the slice, so every chunk of a slice
+        gets the same value.
+        '''
+        key = (slice_value, column)
+        if key not in self._constants:
+            random_state, df = self.random_state, self.df
+            offset = -(-slice_value * self.n // self.slices)
+            if self.seed is not None:
+                self.random_state = np.random.RandomState([self.seed, slice_value])
+            self.df = pd.DataFrame(index=pd.RangeIndex(offset, offset + 1))
+            name = '_get_numbers' if column.startswith('number_') else '_get_' + column
+            getattr(self, name)(column, offset, 1)
+            self._constants[key] = self.df[column].iloc[0]
+            self.random_state, self.df = random_state, df
+        return self._constants[key]
+
+    def _generate(self, offset, size):
+        '''Generates the sample rows from offset to offset + size.'''
+        self.df = pd.DataFrame(index=pd.RangeIndex(offset, offset + size))
+        self._get_id('id', offset, size)
+        self._get_partial_null('partial_null', offset, size)
+        self._get_created_at('created_at', offset, size)
+        self._get_duplicate_string('duplicate_string', offset, size)
+        self._get_string_slicer('string_slicer', offset, size)
+        self._get_mixed_precision_datetime('mixed_precision_datetime', offset, size)
+        self._get_date_string('date_string', offset, size)
+        self._get_mixed_sign_numbers('mixed_sign_numbers', offset, size)
+        for i in range(self.width):
+            self._get_numbers('number_{}'.format(i), offset, size)
+        if self.slices:
+            self._get_slice('slice', offset, size)
+            for slice_value, column, kind in self.anomalies:
+                self.inject_anomaly(self.df, slice_value, column, kind)
+        return self.df.copy()
 
     def get_sample_data(self):
         '''Generates a sample pandas.DataFrame'''
-        self._get_id('id')
-        self._get_partial_null('partial_null')
-        self._get_created_at('created_at')
-        self._get_duplicate_string('duplicate_string')
-        self._get_string_slicer('string_slicer')
-        self._get_mixed_precision_datetime('mixed_precision_datetime')
-        self._get_date_string('date_string')
-        self._get_mixed_sign_numbers('mixed_sign_numbers')
-        return self.df.copy()
+        return self._generate(0, self.n)
+
+    def iter_chunks(self, chunk_size):
+        '''Yields the sample data as consecutive DataFrames of chunk_size rows.
+
+        Ids, timestamps and slices continue across chunks, so concatenating
+        the chunks yields one frame of n rows with ordered slices.
+        '''
+        for offset in range(0, self.n, chunk_size):
+            yield self._generate(offset, min(chunk_size, self.n - offset))
 
 if __name__ == '__main__':
     t = SampleData(30)
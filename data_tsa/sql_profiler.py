@@ -0,0 +1,281 @@
+'''
+This module contains the SqlProfiler class, a Profiler backend that compiles
+inspector measures into aggregate SQL queries over a DB-API connection.
+'''
+
+from math import sqrt
+from pandas import DataFrame, Series, Timestamp, concat
+from data_tsa.number_inspector import NumberInspector
+from data_tsa.profiler import Profiler
+from data_tsa.string_inspector import StringInspector, get_shape_ratios
+
+class SqlProfiler(Profiler):
+
+    def __init__(self, connection, table, slicer=None, columns=None,
+                 sample_size=1000, pull_raw=True):
+        '''Profiles the columns of a database table with aggregate queries.
+
+        Counts, null counts, distinct counts, min/max, sums and the zero,
+        negative, true/false, empty and trim ratios are computed by the
+        database in a single 'GROUP BY slicer' query. The top and bottom
+        five value counts and the value skew of number columns come from a
+        'GROUP BY slicer, column' count query per column. Rows with a null
+        slicer value are skipped, as in data_tsa.Profiler.
+
+        The median, the special character ratio and shape signatures can't
+        be expressed in portable SQL; they are computed in pandas from the
+        raw values of the number and string columns, which costs a full
+        pull of those columns.
+
+        Args:
+            connection: A DB-API 2.0 connection, e.g. sqlite3.Connection.
+            table (str): The table name.
+            slicer (str): Indicates a column containing logical ordered
+                partition, as in data_tsa.Profiler.
+            columns (list): Optional list of columns to profile. The default
+                value is every column in the table.
+            sample_size (int): The number of rows read to detect column types.
+            pull_raw (bool): When False, the median, special character
+                ratio and shape measures are omitted instead of pulling raw
+                values.
+        '''
+        self.connection = connection
+        self.table = table
+        self.pull_raw = pull_raw
+        self.dataframe = self.execute('SELECT * FROM {} LIMIT {:d}'.format(
+                                      self.quote(table), sample_size))
+        self.columns = list(columns or self.dataframe.columns)
+        for column in self.columns:
+            self.validate_column(column)
+        if slicer:
+            self.validate_column(slicer)
+        self._init_attributes(slicer)
+
+    def quote(self, identifier):
+        '''Returns a double-quoted SQL identifier.'''
+        return '"{}"'.format(str(identifier).replace('"', '""'))
+
+    def execute(self, query):
+        '''Executes a query and returns the rows as a pandas.DataFrame.'''
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query)
+            columns = [_[0] for _ in cursor.description]
+            return DataFrame.from_records(cursor.fetchall(), columns=columns)
+        finally:
+            cursor.close()
+
+    def _count_if(self, condition):
+        '''Returns an expression counting the rows matching a condition.'''
+        return 'SUM(CASE WHEN {} THEN 1 ELSE 0 END)'.format(condition)
+
+    def get_aggregates(self, column):
+        '''Returns the (name, expression) aggregates required for a column.'''
+        q = self.quote(column)
+        dtype = self.get_column_dtype(column)
+        aggregates = [('null_count', self._count_if('{} IS NULL'.format(q))),
+                      ('distinct_count', 'COUNT(DISTINCT {})'.format(q))]
+        if dtype == 'number':
+            aggregates += [('min_value', 'MIN({})'.format(q)),
+                           ('max_value', 'MAX({})'.format(q)),
+                           ('negative_count', self._count_if('{} < 0'.format(q))),
+                           ('zero_count', self._count_if('{} = 0'.format(q))),
+                           ('value_count', 'COUNT({})'.format(q)),
+                           ('value_sum', 'SUM({} * 1.0)'.format(q)),
+                           ('value_square_sum', 'SUM({0} * 1.0 * {0})'.format(q))]
+        elif dtype == 'bool':
+            aggregates += [('true_count', self._count_if('{} = 1'.format(q))),
+                           ('false_count', self._count_if('{} = 0'.format(q)))]
+        elif dtype == 'string':
+            aggregates += [('strict_distinct_count',
+                            'COUNT(DISTINCT LOWER(TRIM({})))'.format(q)),
+                           ('empty_count', self._count_if('{} = \'\''.format(q))),
+                           ('trim_required_count',
+                            self._count_if('({0} LIKE \' %\' OR {0} LIKE \'% \')'.format(q)))]
+        elif dtype == 'datetime':
+            aggregates += [('min_value', 'MIN({})'.format(q)),
+                           ('max_value', 'MAX({})'.format(q))]
+        return aggregates
+
+    def compile_query(self):
+        '''Compiles the aggregates of every column into one query.
+
+        Returns:
+            (query, aggregates) where aggregates is a list of
+            (column, name) pairs in the order of the selected expressions.
+        '''
+        selected = ['COUNT(*)']
+        aggregates = [(None, 'row_count')]
+        for column in self.columns:
+            for name, expression in self.get_aggregates(column):
+                selected.append(expression)
+                aggregates.append((column, name))
+        select = ', '.join('{} AS a{:d}'.format(e, i) for i, e in enumerate(selected))
+        query = 'SELECT {} FROM {}'.format(select, self.quote(self.table))
+        if self.slicer:
+            s = self.quote(self.slicer)
+            query = 'SELECT {} AS slice, {} FROM {} WHERE {} IS NOT NULL GROUP BY {} ORDER BY {}'.format(
+                    s, select, self.quote(self.table), s, s, s)
+        return query, aggregates
+
+    def get_value_count_frame(self, column):
+        '''Counts the non-null values of a column per slice in the database.
+
+        Returns:
+            A pandas.DataFrame with 'value' and 'count' columns, plus 'slice'
+            when a slicer is set.
+        '''
+        q = self.quote(column)
+        query = 'SELECT {0} AS value, COUNT(*) AS count FROM {1} WHERE {0} IS NOT NULL GROUP BY {0}'
+        if self.slicer:
+            query = ('SELECT {2} AS slice, {0} AS value, COUNT(*) AS count FROM {1} '
+                     'WHERE {2} IS NOT NULL AND {0} IS NOT NULL GROUP BY {2}, {0}')
+        return self.execute(query.format(q, self.quote(self.table), self.quote(self.slicer)))
+
+    def get_value_count_measures(self, value_counts):
+        '''Derives the value count measures of a number column from its counts.
+
+        Args:
+            value_counts (pandas.DataFrame): The 'value' and 'count' rows of
+                one slice, from get_value_count_frame().
+        '''
+        counts = Series(value_counts['count'].values, index=value_counts['value'].values,
+                        dtype='int64')
+        top, bottom = counts.nlargest(5), counts.nsmallest(5)
+        insp = {}
+        insp['top_five_value_counts'] = top.to_dict()
+        insp['bottom_five_value_counts'] = bottom.to_dict()
+        insp['value_skew'] = bottom.sum() / top.sum() if top.sum() else None
+        return insp
+
+    def get_measures(self, column, row_count, values):
+        '''Derives the inspector measures of a column from its aggregates.'''
+        dtype = self.get_column_dtype(column)
+        insp = {}
+        insp['row_count'] = row_count
+        insp['distinct_count'] = values['distinct_count'] + (1 if values['null_count'] else 0)
+        insp['null_ratio'] = values['null_count'] / row_count
+        if dtype == 'number':
+            n, total = values['value_count'], values['value_sum']
+            insp['min_value'] = values['min_value']
+            insp['max_value'] = values['max_value']
+            insp['negative_ratio'] = values['negative_count'] / row_count
+            insp['mean_value'] = total / n if n else None
+            if n > 1:
+                variance = (values['value_square_sum'] - total * total / n) / (n - 1)
+                insp['stdev'] = sqrt(max(variance, 0))
+            else:
+                insp['stdev'] = None
+            insp['zero_ratio'] = values['zero_count'] / row_count
+        elif dtype == 'bool':
+            insp['true_ratio'] = values['true_count'] / row_count
+            insp['false_ratio'] = values['false_count'] / row_count
+        elif dtype == 'string':
+            strict_distinct_count = values['strict_distinct_count'] + \
+                                    (1 if values['null_count'] else 0)
+            insp['strict_distinct_count'] = strict_distinct_count
+            insp['empty_ratio'] = values['empty_count'] / row_count
+            insp['trim_required_ratio'] = values['trim_required_count'] / row_count
+            insp['redundancy_indicator'] = 1 if insp['distinct_count'] > strict_distinct_count else 0
+        elif dtype == 'datetime':
+            insp['conversion_error_indicator'] = 0
+            for measure in ('min_value', 'max_value'):
+                value = values[measure]
+                insp[measure] = None if value is None else Timestamp(value)
+        return insp
+
+    def get_raw_measures(self, column, series):
+        '''Computes the measures that are not pushed down from raw values.'''
+        dtype = self.get_column_dtype(column)
+        insp = {}
+        if dtype == 'number':
+            inspector = NumberInspector(series.astype(float) if series.dtype == object else series)
+            insp['median_value'] = inspector.get_median_value()
+        elif dtype == 'string':
+            inspector = StringInspector(series)
+            insp['special_character_ratio'] = inspector.get_special_character_ratio()
+            shape_counts = inspector.get_shape_counts()
+            insp['shape_count'] = len(shape_counts)
+            insp['top_shape_ratios'] = (shape_counts.iloc[:5] / len(series)).to_dict()
+            insp['shape_ratios'] = get_shape_ratios(shape_counts, len(series))
+        return insp
+
+    def get_raw_frame(self):
+        '''Pulls the raw values of the columns whose measures can't be pushed down.'''
+        columns = [_ for _ in self.columns if self.get_column_dtype(_) in ('number', 'string')]
+        if not columns or not self.pull_raw:
+            return None
+        selected = [self.quote(_) for _ in columns]
+        query = 'SELECT {} FROM {}'.format(', '.join(selected), self.quote(self.table))
+        if self.slicer:
+            s = self.quote(self.slicer)
+            query = 'SELECT {} AS slice, {} FROM {} WHERE {} IS NOT NULL'.format(
+                    s, ', '.join(selected), self.quote(self.table), s)
+        return self.execute(query)
+
+    def profile(self, lags=3):
+        '''Performs a column-wise evaluation of the columns in the table.
+
+        Args:
+            lags (int): The number of lagging measure values to be added to
+                the output table
+
+        Returns:
+            dataframe: A dataframe containing summary measures for each column.
+        '''
+        output_columns = ['inspector',
+                          'column',
+                          'slice',
+                          'measure',
+                          'measure_value']
+        query, aggregates = self.compile_query()
+        aggregate_frame = self.execute(query)
+        raw = self.get_raw_frame()
+        if raw is not None and self.slicer:
+            raw_slices = {k: df for k, df in raw.groupby('slice', sort=False)}
+        value_counts = {}
+        for column in [_ for _ in self.columns if self.get_column_dtype(_) == 'number']:
+            frame = self.get_value_count_frame(column)
+            if self.slicer:
+                value_counts[column] = {k: df for k, df in frame.groupby('slice', sort=False)}
+            else:
+                value_counts[column] = {None: frame}
+
+        result = []
+        for row in aggregate_frame.to_dict('records'):
+            slice_value = row['slice'] if self.slicer else None
+            values = {}
+            for i, (column, name) in enumerate(aggregates):
+                values.setdefault(column, {})[name] = row['a{:d}'.format(i)]
+            row_count = values[None]['row_count']
+            for column in self.columns:
+                insp = self.get_measures(column, row_count, values[column])
+                if column in value_counts:
+                    empty = DataFrame({'value': [], 'count': []})
+                    insp.update(self.get_value_count_measures(
+                        value_counts[column].get(slice_value, empty)))
+                if raw is not None and column in raw.columns:
+                    df = raw_slices[slice_value] if self.slicer else raw
+                    insp.update(self.get_raw_measures(column, df[column]))
+                df = self.insp_dict_to_dataframe(column, insp)
+                df['inspector'] = self.get_column_dtype(column)
+                df['slice'] = slice_value
+                result.append(df[output_columns])
+
+        result = concat(result)
+
+        if not self.slicer:
+            self.result = result
+            return result
+
+        result = result.sort_values(['inspector',
+                                     'column',
+                                     'measure',
+                                     'slice'])
+
+        if lags:
+            result = self.get_lags(result, lags)
+
+        self.result = result
+
+        return result
@@ -1,6 +1,61 @@
+'''
+This module contains the StringInspector class, as well as the shape
+signature helpers it uses.
+
+Attributes:
+    shape_table (dict): A str.translate table mapping ASCII letters to 'a'
+        and digits to '9'; other characters keep their value.
+    min_shape_ratio (float): The smallest share of values of a shape kept in
+        the 'shape_ratios' measure.
+'''
+
+import numpy as np
+from string import ascii_letters, digits
 from data_tsa.inspector import Inspector
+from pandas import Series, factorize
 from re import search
 
+shape_table = str.maketrans(ascii_letters + digits,
+                            'a' * len(ascii_letters) + '9' * len(digits))
+min_shape_ratio = 0.01
+
+def get_shape_counts(values, counts):
+    '''Aggregates the counts of distinct values by their shape signature.
+
+    A shape maps letters to 'a' and digits to '9', keeps punctuation and
+    whitespace, and collapses runs of letters or digits, so that
+    '555-123-4567' has the shape '9-9-9' and '(555) 123 4567' has the
+    shape '(9) 9 9'. Shapes are computed once per distinct value with
+    vectorized string operations.
+
+    Args:
+        values (list): Distinct non-null values.
+        counts (list): The number of rows of each value.
+
+    Returns:
+        A pandas.Series of counts indexed by shape, sorted by descending
+        count and then by shape.
+    '''
+    if len(values) == 0:
+        return Series(dtype=int)
+    shapes = Series(values).astype(str).str.translate(shape_table)
+    shapes = shapes.str.replace(r'([a9])\1+', r'\1', regex=True)
+    shape_counts = Series(np.asarray(counts), index=shapes.values).groupby(level=0).sum()
+    order = np.lexsort((shape_counts.index.values, -shape_counts.values))
+    return shape_counts.iloc[order]
+
+def get_shape_ratios(shape_counts, row_count, min_ratio=min_shape_ratio):
+    '''Returns a dictionary of the shapes covering at least min_ratio of all values.
+
+    Args:
+        shape_counts (pandas.Series): Counts indexed by shape, as returned
+            by get_shape_counts().
+        row_count (int): The number of values, including nulls.
+        min_ratio (float): The smallest share of values of a returned shape.
+    '''
+    ratios = shape_counts / row_count
+    return ratios[ratios >= min_ratio].to_dict()
+
 class StringInspector(Inspector):
 
     def __init__(self, series):
@@ -51,6 +106,25 @@ class StringInspector(Inspector):
                                                          _[-1] == ' ')])
         return trim_req / self.get_row_count()
 
+    def get_shape_counts(self):
+        '''Returns the number of non-null values of each shape signature.'''
+        codes, uniques = factorize(self.series)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        return get_shape_counts(uniques, counts)
+
+    def get_shape_count(self):
+        '''Returns the number of distinct shape signatures.'''
+        return len(self.get_shape_counts())
+
+    def get_shape_ratios(self, min_ratio=min_shape_ratio):
+        '''Returns a dictionary of every shape covering at least min_ratio of all values.'''
+        return get_shape_ratios(self.get_shape_counts(), self.get_row_count(), min_ratio)
+
+    def get_top_shape_ratios(self, k=5):
+        '''Returns a dictionary of the top k shapes by percentage of all values.'''
+        shape_counts = self.get_shape_counts()
+        return (shape_counts.iloc[:k] / self.get_row_count()).to_dict()
+
     def inspect(self):
         '''Inspects the provided pandas.Series
 
@@ -64,4 +138,8 @@ class StringInspector(Inspector):
 #         result['email_ratio'] = self.get_email_ratio()
         insp['trim_required_ratio'] = self.get_trim_required_ratio()
         insp['redundancy_indicator'] = self.get_redundancy_indicator()
+        shape_counts = self.get_shape_counts()
+        insp['shape_count'] = len(shape_counts)
+        insp['top_shape_ratios'] = (shape_counts.iloc[:5] / self.get_row_count()).to_dict()
+        insp['shape_ratios'] = get_shape_ratios(shape_counts, self.get_row_count())
         return insp
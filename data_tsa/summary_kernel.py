@@ -0,0 +1,96 @@
+'''
+This module contains the summarize function, a fused kernel that computes
+the counting and moment measures of the number and boolean inspectors in a
+single blocked pass over an array.
+
+Attributes:
+    default_block_size (int): The number of values summarized per block;
+        one block of float64 values fits in a typical L2 cache.
+'''
+
+import numpy as np
+from pandas import isnull
+
+default_block_size = 1 << 16
+
+def summarize(values, block_size=default_block_size):
+    '''Summarizes an array in one pass of cache-sized blocks.
+
+    Each block is read from memory once; the null mask, min/max, sums and
+    comparison counts of a block are computed while it is cache resident,
+    and the per-block results are merged. The sum of squared deviations
+    (m2) is merged with Chan's parallel update, which is numerically stable.
+
+    Args:
+        values (numpy.ndarray): A one-dimensional array. Numeric and boolean
+            arrays get every measure; other arrays only get the null, true
+            and false counts.
+        block_size (int): The number of values per block.
+
+    Returns:
+        Dictionary with 'row_count', 'null_count', 'true_count' and
+        'false_count', plus 'count', 'min_value', 'max_value', 'sum',
+        'mean_value', 'm2', 'zero_count' and 'negative_count' for numeric
+        arrays. Moments of arrays without non-null values are NaN.
+    '''
+    numeric = values.dtype.kind in 'biuf'
+    summary = {'row_count': len(values),
+               'null_count': 0,
+               'true_count': 0,
+               'false_count': 0}
+    if numeric:
+        summary.update({'count': 0,
+                        'min_value': np.nan,
+                        'max_value': np.nan,
+                        'sum': 0.0,
+                        'mean_value': np.nan,
+                        'm2': np.nan,
+                        'zero_count': 0,
+                        'negative_count': 0})
+    mean, m2 = 0.0, 0.0
+    for start in range(0, len(values), block_size):
+        block = values[start:start + block_size]
+        if values.dtype.kind == 'f':
+            nulls = np.isnan(block)
+        elif not numeric:
+            nulls = isnull(block)
+        else:
+            nulls = None
+        if nulls is not None:
+            null_count = int(np.count_nonzero(nulls))
+            summary['null_count'] += null_count
+            if null_count:
+                block = block[~nulls]
+        if not numeric:
+            summary['true_count'] += int(np.count_nonzero(block == True))
+            summary['false_count'] += int(np.count_nonzero(block == False))
+            continue
+        n = len(block)
+        if n == 0:
+            continue
+        if block.dtype.kind == 'b':
+            block = block.view(np.uint8)
+        zero_count = int(np.count_nonzero(block == 0))
+        summary['zero_count'] += zero_count
+        summary['false_count'] += zero_count
+        summary['true_count'] += int(np.count_nonzero(block == 1))
+        summary['negative_count'] += int(np.count_nonzero(block < 0))
+        block_min, block_max = block.min(), block.max()
+        if summary['count'] == 0:
+            summary['min_value'], summary['max_value'] = block_min, block_max
+        else:
+            summary['min_value'] = min(summary['min_value'], block_min)
+            summary['max_value'] = max(summary['max_value'], block_max)
+        block_sum = block.sum(dtype=np.float64)
+        block_mean = block_sum / n
+        block_m2 = np.square(block - block_mean).sum()
+        total = summary['count'] + n
+        delta = block_mean - mean
+        mean += delta * n / total
+        m2 += block_m2 + delta * delta * summary['count'] * n / total
+        summary['count'] = total
+        summary['sum'] += block_sum
+    if numeric and summary['count']:
+        summary['mean_value'] = summary['sum'] / summary['count']
+        summary['m2'] = m2
+    return summary
@@ -0,0 +1,313 @@
+'''
+This module contains the JobQueue and ProfilingWorker classes, which run
+profiling and detection jobs in a long-running process that keeps loaded
+data, column types and profile history warm between jobs.
+
+Attributes:
+    job_kinds (tuple): The supported job kinds.
+'''
+
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from json import dumps, loads
+from os import stat
+from threading import Lock, Semaphore
+from time import sleep, time
+from numpy import percentile
+from pandas import DataFrame
+from data_tsa.anomaly_detector import AnomalyDetector
+from data_tsa.dataset_profiler import read_partition
+from data_tsa.profile_cache import ProfileCache
+from data_tsa.profiler import Profiler
+
+job_kinds = ('profile', 'detect')
+
+class JobQueue:
+
+    def __init__(self, path):
+        '''A persistent priority queue of jobs stored in a SQLite table.
+
+        Every operation opens its own connection, so a queue can be shared by
+        threads and by the processes that submit jobs. Jobs with the same
+        payload 'name' run in submission order, so a detect job waits for
+        the profile job of its table.
+
+        Args:
+            path (str): The SQLite database file.
+        '''
+        self.path = path
+        with self._connect() as connection:
+            connection.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                                  id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                  kind TEXT NOT NULL,
+                                  name TEXT,
+                                  payload TEXT NOT NULL,
+                                  priority INTEGER NOT NULL DEFAULT 0,
+                                  status TEXT NOT NULL DEFAULT 'pending',
+                                  submitted REAL,
+                                  started REAL,
+                                  finished REAL,
+                                  error TEXT)''')
+            connection.execute('''CREATE INDEX IF NOT EXISTS jobs_pending
+                                  ON jobs (status, priority, id)''')
+
+    def _connect(self):
+        '''Returns a new connection to the queue database.'''
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def submit(self, kind, payload, priority=0):
+        '''Adds a job to the queue and returns its id.
+
+        Args:
+            kind (str): 'profile' or 'detect'.
+            payload (dict): JSON-serializable job arguments.
+            priority (int): Jobs with a higher priority are claimed first;
+                jobs of equal priority are claimed in submission order.
+        '''
+        if kind not in job_kinds:
+            raise ValueError('\'kind\' must be one of {}'.format(', '.join(job_kinds)))
+        with self._connect() as connection:
+            cursor = connection.execute('''INSERT INTO jobs (kind, name, payload, priority, submitted)
+                                           VALUES (?, ?, ?, ?, ?)''',
+                                        (kind, payload.get('name'), dumps(payload),
+                                         priority, time()))
+            return cursor.lastrowid
+
+    def claim(self, kinds=job_kinds):
+        '''Marks the next pending job of the given kinds as running.
+
+        Returns:
+            Dictionary with 'id', 'kind', 'payload' and 'submitted', or
+            None when no such job is pending.
+        '''
+        if not kinds:
+            return None
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute('''SELECT id, kind, payload, submitted FROM jobs j
+                                        WHERE status = 'pending' AND kind IN ({})
+                                        AND NOT EXISTS (SELECT 1 FROM jobs p
+                                                        WHERE p.name = j.name AND p.id < j.id
+                                                        AND p.status IN ('pending', 'running'))
+                                        ORDER BY priority DESC, id
+                                        LIMIT 1'''.format(', '.join('?' * len(kinds))),
+                                     tuple(kinds)).fetchone()
+            if row is not None:
+                connection.execute('''UPDATE jobs SET status = 'running', started = ?
+                                      WHERE id = ?''', (time(), row[0]))
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        return {'id': row[0], 'kind': row[1], 'payload': loads(row[2]), 'submitted': row[3]}
+
+    def finish(self, job_id, error=None):
+        '''Marks a running job as done, or as failed when an error is given.'''
+        with self._connect() as connection:
+            connection.execute('''UPDATE jobs SET status = ?, finished = ?, error = ?
+                                  WHERE id = ?''',
+                               ('failed' if error else 'done', time(), error, job_id))
+
+    def get_job(self, job_id):
+        '''Returns a dictionary describing a job, or None.'''
+        with self._connect() as connection:
+            cursor = connection.execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            job = dict(zip([_[0] for _ in cursor.description], row))
+        job['payload'] = loads(job['payload'])
+        return job
+
+    def count(self, status='pending'):
+        '''Returns the number of jobs with the given status.'''
+        with self._connect() as connection:
+            return connection.execute('SELECT COUNT(*) FROM jobs WHERE status = ?',
+                                      (status,)).fetchone()[0]
+
+class ProfilingWorker:
+
+    def __init__(self, queue, workers=4, limits=None, max_frames=8, cache=None):
+        '''Runs queued profiling and detection jobs on a thread pool.
+
+        The worker is meant to stay resident: loaded files, column type maps,
+        a ProfileCache of inspection measures and the latest profile of every
+        named table are kept in memory between jobs.
+
+        Profile jobs take a payload with 'name' and 'path' (a CSV or Parquet
+        file), plus optional 'slicer', 'frequency', 'histogram_bins', 'lags'
+        and 'output'. Detect jobs take 'name', plus optional 'target_slice'
+        and 'output', and use the last profile of that name. Outputs ending
+        in '.pkl' are pickled, others are written as CSV.
+
+        Args:
+            queue (data_tsa.JobQueue): The job queue.
+            workers (int): The number of jobs run concurrently.
+            limits (dict): Optional maximum number of concurrent jobs per
+                kind, e.g. {'profile': 2}.
+            max_frames (int): The number of loaded files kept in memory.
+            cache (data_tsa.ProfileCache): The measure cache shared by
+                profile jobs. The default value is an in-memory cache.
+        '''
+        self.queue = queue
+        self.workers = workers
+        self.limits = {kind: Semaphore((limits or {}).get(kind, workers)) for kind in job_kinds}
+        self.max_frames = max_frames
+        self.cache = cache if cache is not None else ProfileCache()
+        self.frames = OrderedDict()
+        self.type_maps = {}
+        self.history = {}
+        self.records = []
+        self._lock = Lock()
+        self._slots = Semaphore(workers)
+        self._started = time()
+
+    def load_frame(self, path):
+        '''Returns the DataFrame of a file, reusing it while the file is unchanged.'''
+        info = stat(path)
+        key = (path, info.st_mtime, info.st_size)
+        with self._lock:
+            if key in self.frames:
+                self.frames.move_to_end(key)
+                return self.frames[key]
+        dataframe = read_partition([path])
+        with self._lock:
+            for k in [_ for _ in self.frames if _[0] == path]:
+                del self.frames[k]
+            self.frames[key] = dataframe
+            while len(self.frames) > self.max_frames:
+                self.frames.popitem(last=False)
+        return dataframe
+
+    def run_profile(self, payload):
+        '''Profiles a file and records the result as the history of its name.'''
+        name = payload['name']
+        dataframe = self.load_frame(payload['path'])
+        profiler = Profiler(dataframe,
+                            slicer=payload.get('slicer'),
+                            histogram_bins=payload.get('histogram_bins'),
+                            frequency=payload.get('frequency'),
+                            cache=self.cache)
+        with self._lock:
+            type_map = dict(self.type_maps.get(name, {}))
+        for column in dataframe.columns:
+            if column not in type_map:
+                type_map[column] = profiler.get_column_dtype(column)
+            if type_map[column] in ('string', 'datetime', 'number', 'bool'):
+                profiler.set_type_exception(column, type_map[column])
+        result = profiler.profile(lags=payload.get('lags', 3))
+        with self._lock:
+            self.type_maps[name] = type_map
+            self.history[name] = profiler
+        return result
+
+    def run_detect(self, payload):
+        '''Detects anomalies in the last profile of a name.'''
+        with self._lock:
+            profiler = self.history.get(payload['name'])
+        if profiler is None:
+            raise KeyError('No profile history for \'{}\''.format(payload['name']))
+        detector = AnomalyDetector(profiler, target_slice=payload.get('target_slice'))
+        detector.detect()
+        return detector.ad_dataframe
+
+    def write_output(self, dataframe, path):
+        '''Writes a job result to a pickle or CSV file.'''
+        if path.endswith('.pkl'):
+            dataframe.to_pickle(path)
+        else:
+            dataframe.to_csv(path, index=False)
+
+    def run_job(self, job):
+        '''Runs a claimed job, records its metrics and marks it finished.'''
+        started = time()
+        error = None
+        try:
+            if job['kind'] == 'profile':
+                result = self.run_profile(job['payload'])
+            else:
+                result = self.run_detect(job['payload'])
+            if job['payload'].get('output'):
+                self.write_output(result, job['payload']['output'])
+        except Exception as e:
+            error = '{}: {}'.format(type(e).__name__, e)
+        finally:
+            self.limits[job['kind']].release()
+            self._slots.release()
+        finished = time()
+        self.queue.finish(job['id'], error)
+        with self._lock:
+            self.records.append({'id': job['id'],
+                                 'kind': job['kind'],
+                                 'wait': started - job['submitted'],
+                                 'latency': finished - started,
+                                 'finished': finished,
+                                 'failed': error is not None})
+        return error
+
+    def _claim(self):
+        '''Claims the next job whose kind is below its concurrency limit.'''
+        available = [kind for kind in job_kinds if self.limits[kind].acquire(blocking=False)]
+        job = self.queue.claim(available)
+        for kind in available:
+            if job is None or kind != job['kind']:
+                self.limits[kind].release()
+        return job
+
+    def run(self, poll_interval=0.5, max_jobs=None, until_empty=False):
+        '''Claims and runs jobs until stopped.
+
+        Args:
+            poll_interval (float): Seconds to wait when no job can be claimed.
+            max_jobs (int): Optional number of jobs after which to stop.
+            until_empty (bool): Stop once the queue has no pending jobs and
+                every claimed job has finished.
+
+        Returns:
+            The number of jobs run.
+        '''
+        count = 0
+        futures = []
+        with ThreadPoolExecutor(self.workers) as executor:
+            while max_jobs is None or count < max_jobs:
+                self._slots.acquire()
+                job = self._claim()
+                if job is None:
+                    self._slots.release()
+                    futures = [_ for _ in futures if not _.done()]
+                    if until_empty and not futures and not self.queue.count():
+                        break
+                    sleep(poll_interval)
+                    continue
+                futures.append(executor.submit(self.run_job, job))
+                count += 1
+        return count
+
+    def metrics(self):
+        '''Returns the latency and throughput of the finished jobs.
+
+        Returns:
+            A pandas.DataFrame with one row per job kind, and a row for all
+            jobs, holding the number of jobs and failures, the mean queue
+            wait, the mean, median and 95th percentile latency in seconds,
+            and the throughput in jobs per second since the worker started.
+        '''
+        with self._lock:
+            records = list(self.records)
+        elapsed = max(time() - self._started, 1e-9)
+        rows = []
+        for kind in list(job_kinds) + ['all']:
+            r = [_ for _ in records if kind in ('all', _['kind'])]
+            latency = [_['latency'] for _ in r]
+            rows.append({'kind': kind,
+                         'jobs': len(r),
+                         'failed': sum(_['failed'] for _ in r),
+                         'mean_wait': sum(_['wait'] for _ in r) / len(r) if r else None,
+                         'mean_latency': sum(latency) / len(r) if r else None,
+                         'p50_latency': percentile(latency, 50) if r else None,
+                         'p95_latency': percentile(latency, 95) if r else None,
+                         'throughput': len(r) / elapsed})
+        return DataFrame(rows)
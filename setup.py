@@ -18,5 +18,7 @@ setup(name='data_tsa',
       version='0.0.1',
       description='A data profiling utility.',
       author='Slalom',
-      packages=['data_tsa']
+      packages=['data_tsa'],
+      extras_require={'arrow': ['pyarrow']},
+      entry_points={'console_scripts': ['data-tsa=data_tsa.cli:main']}
       )
\ No newline at end of file
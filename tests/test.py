@@ -1,8 +1,10 @@
 
 import pytest
+import sqlite3
 
 from datetime import datetime
-from pandas import DataFrame, Series
+from time import perf_counter, sleep
+from pandas import DataFrame, Series, concat, read_csv, read_parquet, to_datetime
 from numpy import NaN
 
 from data_tsa.inspector import Inspector
@@ -10,6 +12,23 @@ from data_tsa.date_inspector import DateInspector
 from data_tsa.number_inspector import NumberInspector
 from data_tsa.string_inspector import StringInspector
 from data_tsa.dataframe_inspector import DataFrameInspector
+from data_tsa.profiler import Profiler
+from data_tsa.anomaly_detector import AnomalyDetector
+from data_tsa.online_detector import OnlineDetector
+from data_tsa.result_index import ResultIndex
+from data_tsa.sample_data import SampleData
+from data_tsa.dataset_profiler import DatasetProfiler, read_partition
+from data_tsa.sql_profiler import SqlProfiler
+from data_tsa.profile_cache import ProfileCache
+from data_tsa.correlation_inspector import CorrelationInspector
+from data_tsa.worker import JobQueue, ProfilingWorker
+from data_tsa.summary_kernel import summarize
+from data_tsa.prefetch_reader import PrefetchReader
+from data_tsa.cli import main, decode_value
+
+def slow_read_partition(files, columns=None):
+    sleep(0.5)
+    return read_partition(files, columns)
 
 @pytest.fixture
 def number_series():
@@ -19,6 +38,16 @@ def number_series():
     return Series(s)
 
 
+@pytest.fixture
+def sliced_profiler():
+    df = DataFrame({'slicer': ['a', 'a', 'b', 'b', 'c', 'c', 'd', 'd'],
+                    'number': [1, 2, 1, 2, 1, 2, 0, 0],
+                    'text': ['x', 'y', 'x', 'y', 'x', 'y', '', '']})
+    profiler = Profiler(df, slicer='slicer')
+    profiler.profile()
+    return profiler
+
+
 class TestDataFrameInspector:
     
     def test_get_duplicate_row_indicator(self):
@@ -104,6 +133,26 @@ class TestNumberInspector:
     def test_get_value_skew(self, number_series):
         insp = NumberInspector(number_series)
         assert insp.get_value_skew() == 0.375
+
+    def test_get_histogram_sketch(self):
+        s = Series([1, 2, 2, NaN, 9])
+        insp = NumberInspector(s, bin_edges=[-float('inf'), 2, 5, float('inf')])
+        assert insp.get_histogram_sketch() == [1, 2, 1]
+
+    def test_summarize(self):
+        s = Series([3, -1.5, NaN, 0, 7, 0, NaN, 2.25, 1, -4])
+        summary = summarize(s.values, block_size=3)
+        assert summary['null_count'] == 2
+        assert summary['count'] == 8
+        assert summary['zero_count'] == 2
+        assert summary['negative_count'] == 2
+        assert (summary['min_value'], summary['max_value']) == (-4, 7)
+        assert summary['mean_value'] == pytest.approx(s.mean())
+        insp = NumberInspector(s)
+        assert insp.get_stdev() == pytest.approx(s.std())
+        summary = summarize(Series([True, None, False, True], dtype=object).values,
+                            block_size=3)
+        assert (summary['null_count'], summary['true_count'], summary['false_count']) == (1, 2, 1)
         
         
 class TestStringInspector:
@@ -140,4 +189,497 @@ class TestStringInspector:
         s = Series(['A', 'a'])
         insp = StringInspector(s)
         assert insp.get_redundancy_indicator() == 1
-        
\ No newline at end of file
+
+    def test_get_top_shape_ratios(self):
+        s = Series(['555-123-4567', '555-999-0000', None, '(555) 123 4567'])
+        insp = StringInspector(s)
+        assert insp.get_top_shape_ratios() == {'9-9-9': 0.5, '(9) 9 9': 0.25}
+        assert insp.get_shape_count() == 2
+
+
+class TestCorrelationInspector:
+
+    def test_matrices(self):
+        df = DataFrame({'a': [1, 2, 3, 4, NaN], 'b': [2, 4, 6, 9, NaN],
+                        'c': [5, 5, 5, 5, 5]})
+        insp = CorrelationInspector(df)
+        correlation = insp.get_correlation_matrix()
+        assert correlation[0, 1] == pytest.approx(df['a'].corr(df['b']))
+        assert correlation[0, 2] != correlation[0, 2]
+        cooccurrence = insp.get_null_cooccurrence_matrix()
+        assert cooccurrence[0, 1] == pytest.approx(0.2)
+        assert cooccurrence[0, 2] == 0
+        result = insp.inspect()
+        assert list(result) == ['a:b', 'a:c', 'b:c']
+        assert result['a:c'] == {'correlation': None, 'null_cooccurrence_ratio': 0.0}
+
+    def test_detect_column_swap(self):
+        a = [1, 2, 3, 4, 5, 6]
+        df = DataFrame({'slicer': sorted([0, 1, 2, 3] * 6),
+                        'a': a * 4,
+                        'b': a * 3 + a[::-1],
+                        'c': a[::-1] * 3 + a})
+        profiler = Profiler(df, slicer='slicer', correlation=True)
+        result = profiler.profile()
+        assert set(result[result['inspector']=='correlation']['column']) == \
+               {'a:b', 'a:c', 'b:c'}
+        ad = AnomalyDetector(profiler, rules=[('correlation', 'correlation',
+                                               'get_abs_delta_flag', (0.5,))])
+        assert set(ad.detect()['column']) == {'a:b', 'a:c'}
+
+
+class TestProfiler:
+
+    def test_time_buckets(self):
+        created_at = to_datetime(['2021-01-04 01:00', '2021-01-04 05:00', None,
+                                  '2021-01-06 02:00', '2021-01-11 00:00'])
+        df = DataFrame({'created_at': created_at, 'number': [1, 2, 3, 4, 5]})
+        profiler = Profiler(df, slicer='created_at', frequency='day')
+        result = profiler.profile(lags=1)
+        assert len(profiler.get_slicer_values()) == 8
+        df = result[(result['column']=='number') & (result['measure']=='row_count')]
+        assert df['measure_value'].tolist() == [2, 0, 1, 0, 0, 0, 0, 1]
+        assert df['l1_measure_value'].tolist() == [None, 2, 0, 1, 0, 0, 0, 0]
+        df = result[(result['column']=='number') & (result['measure']=='max_value')]
+        assert df['measure_value'].tolist()[1] is None
+        weekly = Profiler(DataFrame({'created_at': created_at}), slicer='created_at',
+                          frequency='week')
+        assert [str(_.date()) for _ in weekly.get_slicer_values()] == ['2021-01-04',
+                                                                       '2021-01-11']
+        with pytest.raises(ValueError):
+            Profiler(df, slicer='measure', frequency='day')
+
+    def test_profile_stream(self, tmp_path):
+        df = DataFrame({'slicer': [1] * 5 + [2] * 9 + [3] * 3,
+                        'number': list(range(17)),
+                        'text': ['x', 'y', None] * 5 + ['z', 'z']})
+        df.to_parquet(str(tmp_path / 'data.parquet'), row_group_size=4)
+        reader = PrefetchReader(str(tmp_path / 'data.parquet'), chunk_size=4,
+                                max_chunks=2, memory_budget=1, min_chunk_size=2)
+        profiler = Profiler(df, slicer='slicer')
+        result = profiler.profile_stream(reader, lags=1)
+        expected = Profiler(df, slicer='slicer').profile(lags=1)
+        assert result.astype(str).values.tolist() == expected.astype(str).values.tolist()
+        stats = reader.stats()
+        assert stats['rows'] == 17 and stats['bound'] in ('io', 'cpu')
+        assert reader.chunk_sizes[:2] == [4, 2]
+        partitions = [[str(tmp_path / 'data.parquet')]] * 3
+        assert [len(_) for _ in PrefetchReader(partitions, workers=2, max_chunks=1)] == [17] * 3
+        with pytest.raises(ValueError):
+            Profiler(df, slicer='slicer').profile_stream([df[df['slicer'] == 2], df])
+        df[df['slicer'] > 1].to_parquet(str(tmp_path / 'late.parquet'))
+        reader = PrefetchReader([[str(tmp_path / 'late.parquet')], [str(tmp_path / 'data.parquet')]] * 2,
+                                max_chunks=1)
+        with pytest.raises(ValueError):
+            Profiler(df, slicer='slicer').profile_stream(reader)
+        assert reader._closed and not any(_.is_alive() for _ in reader._threads)
+
+
+class TestAnomalyDetector:
+
+    def test_plan_rules(self, sliced_profiler):
+        rules = [('zero_ratio', 'number', 'get_positive_ratio_flag', ()),
+                 ('zero_ratio', 'number', 'get_zero_ratio_flag', ()),
+                 ('row_count', None, 'get_abs_perc_error_flag', (1,))]
+        ad = AnomalyDetector(sliced_profiler, rules=rules)
+        plan = ad.plan_rules()
+        assert list(plan.keys()) == [('number', 'zero_ratio'), (None, 'row_count')]
+        assert len(plan[('number', 'zero_ratio')]) == 2
+
+    def test_add_rule_validation(self, sliced_profiler):
+        ad = AnomalyDetector(sliced_profiler, rules=[])
+        with pytest.raises(ValueError):
+            ad.add_rule('zero_ratio', 'number', 'not_a_rule')
+
+    def test_detect_with_rules(self, sliced_profiler):
+        rules = [('zero_ratio', 'number', 'get_positive_ratio_flag', ()),
+                 ('empty_ratio', 'string', 'get_positive_ratio_flag', ())]
+        ad = AnomalyDetector(sliced_profiler, rules=rules)
+        summary = ad.detect()
+        assert set(summary['column']) == {'number', 'text'}
+        assert set(ad.ad_dataframe['reference_lags']) == {1, 2, 3}
+
+    def test_get_lags(self, sliced_profiler):
+        df = sliced_profiler.result
+        df = df[(df['column']=='number') & (df['measure']=='max_value')]
+        assert df['l1_measure_value'].tolist() == [None, 2, 2, 2]
+        assert df['l3_measure_value'].tolist() == [None, None, None, 2]
+
+    def test_rolling_scores(self):
+        df = DataFrame({'slicer': [0, 0, 1, 1, 2, 2, 3, 3, 4, 4],
+                        'number': [1, 3, 1, 5, 1, 3, 1, 5, 1, 23]})
+        profiler = Profiler(df, slicer='slicer')
+        profiler.profile()
+        ad = AnomalyDetector(profiler)
+        zscore = ad.get_rolling_zscore(window=4)
+        zscore = zscore[(zscore['column']=='number') &
+                        (zscore['measure']=='max_value')]
+        assert zscore['slice'].tolist() == [3, 4]
+        assert zscore['score'].tolist()[-1] == pytest.approx(19 / 1.1547005)
+        mad = ad.get_rolling_mad_score(window=4)
+        mad = mad[(mad['column']=='number') & (mad['measure']=='max_value') &
+                  (mad['slice']==4)]
+        assert mad['score'].tolist() == [pytest.approx(19 / 1.4826)]
+        summary = ad.detect_rolling(window=4, period=2, seasonal_window=2)
+        assert 'number' in summary['column'].tolist()
+
+    def test_time_bucketed_target(self):
+        created_at = to_datetime(['2021-01-01', '2021-01-02', '2021-01-03',
+                                  '2021-01-04', '2021-01-05'])
+        df = DataFrame({'created_at': created_at.repeat(2),
+                        'number': [1, 3] * 4 + [100, 300]})
+        profiler = Profiler(df, slicer='created_at', frequency='day')
+        profiler.profile()
+        ad = AnomalyDetector(profiler)
+        assert ad.target_slice == to_datetime('2021-01-05')
+        assert 'number' in ad.detect()['column'].tolist()
+        ad = AnomalyDetector(profiler)
+        assert 'number' in ad.detect_rolling(window=3, period=2, seasonal_window=2)['column'].tolist()
+
+    def test_seasonal_zscore_missing_day(self):
+        days = to_datetime(['2021-01-{:02d}'.format(_) for _ in range(4, 32) if _ != 20])
+        df = DataFrame({'day': days,
+                        'number': [10 + _.week % 2 if _.dayofweek == 0 else 1 + _.day % 2
+                                   for _ in days]})
+        profiler = Profiler(df, slicer='day')
+        profiler.profile()
+        scores = AnomalyDetector(profiler).get_seasonal_zscore(window=3, min_periods=2)
+        scores = scores[(scores['column']=='number') & (scores['measure']=='max_value')]
+        assert scores.set_index('slice')['score'][to_datetime('2021-01-25')] < 3
+
+    def test_rolling_scores_flat_history(self):
+        df = DataFrame({'slicer': list(range(10)),
+                        'number': [1] * 9 + [None]})
+        profiler = Profiler(df, slicer='slicer')
+        profiler.profile()
+        ad = AnomalyDetector(profiler)
+        summary = ad.detect_rolling(window=4, period=2, seasonal_window=2)
+        assert ad.ad_dataframe['anomaly_score'].max() == ad.max_anomaly_score
+        assert summary.set_index('column').loc['number', 'anomaly_score'] < float('inf')
+
+    def test_drift_measures(self):
+        df = DataFrame({'slicer': [0] * 4 + [1] * 4 + [2] * 4,
+                        'number': [1, 2, 3, 4, 1, 2, 3, 4, 4, 4, 4, 4]})
+        profiler = Profiler(df, slicer='slicer', histogram_bins=4)
+        result = profiler.profile(lags=1)
+        result = result[result['column']=='number'].set_index(['measure', 'slice'])
+        assert result.loc[('ks_statistic', 1), 'measure_value'] == 0
+        assert result.loc[('ks_statistic', 2), 'measure_value'] == pytest.approx(0.75)
+        assert result.loc[('psi', 2), 'measure_value'] > 0.25
+        ad = AnomalyDetector(profiler, rules=[('psi', 'number', 'get_threshold_flag', (0.25,))])
+        assert 'number' in ad.detect()['column'].tolist()
+
+    def test_shape_change(self):
+        phones = ['555-123-4567', '555-000-1111']
+        df = DataFrame({'slicer': sorted([0, 1, 2, 3] * 2),
+                        'phone': phones * 3 + ['(555) 123 4567', '(555) 000 1111']})
+        profiler = Profiler(df, slicer='slicer')
+        profiler.profile()
+        ad = AnomalyDetector(profiler, rules=[('shape_ratios', 'string',
+                                               'get_shape_change_flag', (0.05,))])
+        assert ad.detect()['column'].tolist() == ['phone']
+        assert ad.ad_dataframe['anomaly_score'].tolist() == [1, 2, 3]
+
+    def test_shape_change_beyond_top_five(self):
+        # seven shapes of 10% or more; the sixth and fifth swap ranks
+        shapes = ['a', '9', 'a-9', '9-a', 'a 9', '9 a', 'a.9']
+        first = sum([[s] * n for s, n in zip(shapes, [20, 18, 16, 14, 11, 12, 10])], [])
+        second = sum([[s] * n for s, n in zip(shapes, [20, 18, 16, 14, 12, 11, 10])], [])
+        df = DataFrame({'slicer': [0] * 101 + [1] * 101 + [2] * 101 + [3] * 101,
+                        'text': first * 3 + second})
+        profiler = Profiler(df, slicer='slicer')
+        profiler.profile()
+        ad = AnomalyDetector(profiler, rules=[('shape_ratios', 'string',
+                                               'get_shape_change_flag', (0.05,))])
+        ad.detect()
+        assert ad.ad_dataframe.empty
+
+    def test_multi_column_slicer(self):
+        df = DataFrame({'day': [1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3],
+                        'region': ['e', 'e', 'w', 'w'] * 3,
+                        'number': [1, 2, 5, 6, 1, 2, 5, 6, 1, 2, 0, 0]})
+        profiler = Profiler(df, slicer=['day', 'region'])
+        result = profiler.profile(lags=1)
+        df = result[(result['column']=='number') & (result['measure']=='max_value')]
+        assert df['slice'].tolist() == [(1, 'e'), (1, 'w'), (2, 'e'), (2, 'w'),
+                                        (3, 'e'), (3, 'w')]
+        assert df['l1_measure_value'].tolist() == [None, None, 2, 6, 2, 6]
+        ad = AnomalyDetector(profiler, rules=[('zero_ratio', 'number',
+                                               'get_positive_ratio_flag', ())])
+        assert ad.target_slice == 3
+        ad.detect()
+        assert ad.ad_dataframe['slice'].tolist() == [(3, 'w')]
+
+    def test_rollup(self):
+        df = DataFrame({'day': [1, 1, 1, 1, 2, 2, 2, 2],
+                        'region': ['e', 'e', 'w', 'w'] * 2,
+                        'number': [1, 2, 5, NaN, 3, 4, 5, 9]})
+        profiler = Profiler(df, slicer=['day', 'region'])
+        profiler.profile()
+        result = profiler.rollup(lags=1)
+        expected = Profiler(df, slicer='day').profile(lags=1)
+        keys = ['inspector', 'column', 'slice', 'measure']
+        result = result.set_index(keys)['measure_value']
+        expected = expected.set_index(keys)['measure_value']
+        assert 'median_value' not in result.index.get_level_values('measure')
+        for key, value in result.items():
+            assert value == pytest.approx(expected[key])
+
+
+class TestOnlineDetector:
+
+    def test_update_and_persist(self, tmp_path):
+        path = str(tmp_path / 'state.json')
+        for i, values in enumerate([[1, 2, 3], [1, 2, 3], [1, 2, 3], [0, 0, 3]]):
+            df = DataFrame({'n': values})
+            profile = Profiler(df).profile_dataframe(df, i)
+            result = OnlineDetector(state_path=path).update(profile)
+        flagged = result[result['measure']=='zero_ratio']
+        assert flagged['rule'].tolist() == ['get_positive_ratio_flag',
+                                            'get_range_flag']
+        assert flagged['reference_lags'].tolist()[0] == 3
+
+    def test_repeated_slice_is_ignored(self):
+        od = OnlineDetector()
+        df = DataFrame({'n': [1, 2, 3]})
+        profile = Profiler(df).profile_dataframe(df, 'a')
+        od.update(profile)
+        od.update(profile)
+        assert od.state['number|n|row_count']['count'] == 1
+
+    def test_unsliced_profiles(self, tmp_path):
+        path = str(tmp_path / 'state.json')
+        for values in [[1, 2, 3], [1, 2, 3], [1, 2, 3], [0, 0, 3]]:
+            result = OnlineDetector(state_path=path).update(Profiler(DataFrame({'n': values})).profile())
+        assert OnlineDetector(state_path=path).state['number|n|row_count']['count'] == 4
+        flagged = result[result['measure']=='zero_ratio']
+        assert 'get_positive_ratio_flag' in flagged['rule'].tolist()
+
+
+class TestResultIndex:
+
+    def test_lookup(self):
+        df = DataFrame({'column': ['a', 'b', 'a'],
+                        'measure': ['x', 'x', 'y'],
+                        'measure_value': [1, 2, 3]})
+        index = ResultIndex(df)
+        assert index.lookup(column='a')['measure_value'].tolist() == [1, 3]
+        assert index.lookup(column='a', measure='y')['measure_value'].tolist() == [3]
+        assert index.lookup(column='c').empty
+
+    def test_profiler_index_invalidation(self, sliced_profiler):
+        index = sliced_profiler.get_result_index()
+        assert sliced_profiler.get_result_index() is index
+        sliced_profiler.result = sliced_profiler.result.iloc[0:0]
+        assert sliced_profiler.get_result_index() is not index
+
+
+class TestSampleData:
+
+    def test_seed(self):
+        a = SampleData(100, seed=1).get_sample_data()
+        b = SampleData(100, seed=1).get_sample_data()
+        assert a.equals(b)
+
+    def test_created_at_range(self):
+        sd = SampleData(2000000, seed=1)
+        assert sd.created_at_step < SampleData(100).created_at_step
+        assert sd.get_sample_data()['created_at'].is_monotonic_increasing
+
+    def test_iter_chunks(self):
+        chunks = list(SampleData(100, seed=1, slices=4).iter_chunks(30))
+        assert [len(_) for _ in chunks] == [30, 30, 30, 10]
+        assert chunks[-1]['id'].tolist()[-1] == 99
+        assert chunks[-1]['slice'].tolist()[-1] == 3
+
+    def test_anomalies(self):
+        sd = SampleData(100, seed=1, slices=4, width=1,
+                        anomalies=[(3, 'number_0', 'null')])
+        df = sd.get_sample_data()
+        assert df[df['slice']==3]['number_0'].isnull().all()
+        assert df[df['slice']!=3]['number_0'].notnull().all()
+        anomalies = [(2, 'number_0', 'constant'), (3, 'duplicate_string', 'constant')]
+        df = SampleData(100, seed=1, slices=4, width=1, anomalies=anomalies).get_sample_data()
+        chunks = concat(SampleData(100, seed=1, slices=4, width=1,
+                                   anomalies=anomalies).iter_chunks(20))
+        for slice_value, column, _ in anomalies:
+            values = set(df[df['slice']==slice_value][column])
+            assert len(values) == 1
+            assert set(chunks[chunks['slice']==slice_value][column]) == values
+
+
+class TestArrowProfiler:
+
+    @pytest.mark.parametrize('row_group_size', [3, 2, 4])
+    def test_profile_matches_pandas(self, tmp_path, row_group_size):
+        pq = pytest.importorskip('pyarrow.parquet')
+        from pyarrow import Table
+        from data_tsa.arrow_profiler import ArrowProfiler
+        df = DataFrame({'slicer': ['a'] * 3 + ['b'] * 3,
+                        'number': [1, 2, NaN, -4, 0, 0],
+                        'text': ['x', 'X ', None, '', 'y!', 'y'],
+                        'flag': [True, False, True, True, True, False],
+                        'nullable': [1, NaN, 0, 1, 0, 0]})
+        path = str(tmp_path / 'data.parquet')
+        table = Table.from_pandas(df, preserve_index=False)
+        table = table.set_column(4, 'nullable', table['nullable'].cast('int64'))
+        pq.write_table(table, path, row_group_size=row_group_size)
+        expected = Profiler(df, slicer='slicer').profile()
+        result = ArrowProfiler(path, slicer='slicer').profile()
+        keys = ['inspector', 'column', 'slice', 'measure']
+        expected = expected.set_index(keys)['measure_value']
+        result = result.set_index(keys)['measure_value']
+        assert sorted(result.index) == sorted(expected.index)
+        for key, value in expected.items():
+            if key[3] in ('top_five_value_counts', 'bottom_five_value_counts'):
+                continue
+            assert result[key] == pytest.approx(value, nan_ok=True)
+
+
+class TestDatasetProfiler:
+
+    def test_profile_partitions(self, tmp_path):
+        df = DataFrame({'number': [1, 2, 3], 'text': ['a', 'b', 'c']})
+        for day in ['2019-01-01', '2019-01-02', '2019-01-03', '2019-01-04']:
+            (tmp_path / 'dt={}'.format(day)).mkdir()
+            df.to_csv(str(tmp_path / 'dt={}'.format(day) / 'part-0.csv'), index=False)
+        profiler = DatasetProfiler(str(tmp_path), 'dt', start='2019-01-02', workers=2)
+        assert profiler.get_slicer_values() == ['2019-01-02', '2019-01-03', '2019-01-04']
+        result = profiler.profile(lags=1)
+        expected = Profiler(df).profile_dataframe(df, None)
+        assert len(result) == 3 * len(expected)
+        assert set(result['column']) == {'number', 'text'}
+        assert result['l1_measure_value'].notnull().sum() == 2 * len(expected)
+
+
+    def test_iter_profile_stops_early(self, tmp_path):
+        df = DataFrame({'number': [1, 2, 3]})
+        for day in range(8):
+            (tmp_path / 'dt={}'.format(day)).mkdir()
+            df.to_csv(str(tmp_path / 'dt={}'.format(day) / 'part-0.csv'), index=False)
+        profiler = DatasetProfiler(str(tmp_path), 'dt', workers=2,
+                                   reader=slow_read_partition)
+        results = profiler.iter_profile()
+        assert next(results)[0] == '0'
+        started = perf_counter()
+        results.close()
+        assert perf_counter() - started < 1
+
+class TestSqlProfiler:
+
+    def test_profile_matches_pandas(self):
+        df = DataFrame({'slicer': ['a'] * 4 + ['b'] * 4 + [None],
+                        'number': [1, 2, NaN, -4, 0, 0, 3, 3, 7],
+                        'text': ['x', 'X ', None, '', 'y!', 'y', 'y', ' z', 'n'],
+                        'flag': [1, 0, 1, 1, 1, 0, 0, 0, 1]})
+        connection = sqlite3.connect(':memory:')
+        df.to_sql('data', connection, index=False)
+        expected = Profiler(df, slicer='slicer').profile()
+        result = SqlProfiler(connection, 'data', slicer='slicer').profile()
+        keys = ['inspector', 'column', 'slice', 'measure']
+        expected = expected.set_index(keys)['measure_value']
+        result = result.set_index(keys)['measure_value']
+        assert sorted(result.index) == sorted(expected.index)
+        for key, value in expected.items():
+            if isinstance(value, dict):
+                assert result[key] == value
+            else:
+                assert result[key] == pytest.approx(value, nan_ok=True)
+
+    def test_compile_query(self):
+        connection = sqlite3.connect(':memory:')
+        DataFrame({'slicer': ['a'], 'number': [1.5]}).to_sql('data', connection, index=False)
+        profiler = SqlProfiler(connection, 'data', slicer='slicer', columns=['number'])
+        query, aggregates = profiler.compile_query()
+        assert query.startswith('SELECT "slicer" AS slice, COUNT(*) AS a0')
+        assert query.endswith('WHERE "slicer" IS NOT NULL GROUP BY "slicer" ORDER BY "slicer"')
+        assert aggregates[0] == (None, 'row_count')
+
+
+class TestProfileCache:
+
+    def test_lru_eviction(self):
+        cache = ProfileCache(max_size=2)
+        cache.put('a', {'row_count': 1})
+        cache.put('b', {'row_count': 2})
+        assert cache.get('a') == {'row_count': 1}
+        cache.put('c', {'row_count': 3})
+        assert list(cache.entries) == ['a', 'c']
+        assert cache.get('b') is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_unchanged_slices_are_cached(self, tmp_path):
+        df = DataFrame({'slicer': ['a', 'a', 'b', 'b', 'c', 'c'],
+                        'number': [1, 2, 3, 4, 5, 6]})
+        path = str(tmp_path / 'cache.pkl')
+        expected = Profiler(df, slicer='slicer', cache=ProfileCache(path)).profile()
+        df.loc[df['slicer'] == 'c', 'number'] = 42
+        cache = ProfileCache(path)
+        assert len(cache.entries) == 6
+        result = Profiler(df, slicer='slicer', cache=cache).profile()
+        assert (cache.hits, cache.misses) == (5, 1)
+        assert len(result) == len(expected)
+        changed = result[(result['column'] == 'number') &
+                         (result['measure'] == 'max_value')]
+        assert list(changed['measure_value']) == [2, 4, 42]
+
+
+class TestProfilingWorker:
+
+    def test_run_jobs(self, tmp_path):
+        df = DataFrame({'slicer': ['a', 'a', 'b', 'b', 'c', 'c', 'd', 'd'],
+                        'number': [1, 2, 1, 2, 1, 2, 0, 0]})
+        df.to_csv(str(tmp_path / 'data.csv'), index=False)
+        queue = JobQueue(str(tmp_path / 'queue.db'))
+        detect = queue.submit('detect', {'name': 'data', 'output': str(tmp_path / 'ad.csv')},
+                              priority=1)
+        queue.submit('profile', {'name': 'other', 'path': str(tmp_path / 'missing.csv')})
+        first = queue.submit('profile', {'name': 'data', 'path': str(tmp_path / 'data.csv'),
+                                         'slicer': 'slicer'})
+        queue.submit('detect', {'name': 'data', 'output': str(tmp_path / 'ad.csv')},
+                     priority=1)
+        assert queue.claim(['detect'])['id'] == detect
+        queue.finish(detect, 'skipped')
+        worker = ProfilingWorker(queue, workers=2, limits={'profile': 1})
+        assert worker.run(poll_interval=0.01, until_empty=True) == 3
+        assert queue.count('done') == 2
+        assert queue.count('failed') == 2
+        assert queue.get_job(first)['status'] == 'done'
+        assert worker.type_maps['data'] == {'slicer': 'string', 'number': 'number'}
+        assert 'zero_ratio' in read_csv(str(tmp_path / 'ad.csv'))['measure'].tolist()
+        metrics = worker.metrics().set_index('kind')
+        assert metrics.loc['all', 'jobs'] == 3
+        assert metrics.loc['profile', 'failed'] == 1
+
+
+class TestCli:
+
+    def test_profile_and_detect(self, tmp_path, capsys):
+        df = DataFrame({'slicer': ['a', 'a', 'b', 'b', 'c', 'c', 'd', 'd'],
+                        'number': [1, 2, 1, 2, 1, 2, 0, 0]})
+        df.to_csv(str(tmp_path / 'data.csv'), index=False)
+        output = str(tmp_path / 'profile.csv')
+        main(['profile', str(tmp_path / 'data.csv'), '--slicer', 'slicer',
+              '--lags', '1', '--output', output])
+        profile = read_csv(output)
+        expected = Profiler(df, slicer='slicer').profile(lags=1)
+        assert len(profile) == len(expected)
+        rows = profile[(profile['column']=='number') & (profile['measure']=='zero_ratio')]
+        assert [decode_value(_) for _ in rows['measure_value']] == [0, 0, 0, 1]
+        assert [decode_value(_) for _ in rows['l1_measure_value']] == [None, 0, 0, 0]
+        # an interrupted run is resumed from the complete slices
+        content = open(output).read()
+        with open(output, 'w') as f:
+            f.write(content[:len(content) // 2])
+        main(['profile', str(tmp_path / 'data.csv'), '--slicer', 'slicer',
+              '--lags', '1', '--output', output, '--resume'])
+        assert open(output).read() == content
+        main(['profile', str(tmp_path / 'data.csv'), '--slicer', 'slicer', '--lags', '1',
+              '--output', str(tmp_path / 'streamed.csv'), '--chunk-size', '3', '--stats'])
+        assert open(str(tmp_path / 'streamed.csv')).read() == content
+        captured = capsys.readouterr()
+        assert 'read 3 chunks, 8 rows' in captured.err and 'chunks' not in captured.out
+        main(['detect', output, '--output', str(tmp_path / 'ad'), '--slices', 'c', 'd'])
+        ad = read_parquet(str(tmp_path / 'ad'))
+        assert set(ad['slice']) == {'d'}
+        assert 'zero_ratio' in ad['measure'].tolist()